@@ -0,0 +1,74 @@
+"""Question deadlines: one sleeping task per chat vs. the central DeadlineScheduler.
+
+Usage: python -m bench.deadlines [chat counts...]
+Each chat gets a deadline ~1s out (jittered); half of them are re-armed once,
+as when the next question of a round is asked. Reports setup time, peak
+memory, and how late each finalize fired.
+"""
+import asyncio, os, random, sys, time, tracemalloc
+
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+from src.timers import DeadlineScheduler
+
+DELAY = 1.0
+
+def _report(name: str, n: int, setup_ms: float, peak: int, late: list[float]):
+    late.sort()
+    pct = lambda p: late[min(len(late) - 1, int(p * len(late)))] * 1000
+    print(f"{name:>10} {n:>7} {setup_ms:>9.1f} {peak / 1024:>9.0f} {pct(0.5):>8.2f} {pct(0.99):>8.2f} {late[-1] * 1000:>8.2f}")
+
+async def _per_task(n: int):
+    late, due = [], {}
+    async def finalize_after(chat_id, delay):
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            return
+        late.append(time.monotonic() - due[chat_id])
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    tasks = {}
+    for c in range(n):
+        d = DELAY + random.random() * 0.2
+        due[c] = time.monotonic() + d
+        tasks[c] = asyncio.create_task(finalize_after(c, d))
+    for c in range(0, n, 2):
+        tasks[c].cancel()
+        d = DELAY + random.random() * 0.2
+        due[c] = time.monotonic() + d
+        tasks[c] = asyncio.create_task(finalize_after(c, d))
+    setup = (time.perf_counter() - t0) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await asyncio.gather(*tasks.values(), return_exceptions=True)
+    _report("per-task", n, setup, peak, late)
+
+async def _central(n: int):
+    late, due, done = [], {}, asyncio.Event()
+    async def finalize(chat_id):
+        late.append(time.monotonic() - due[chat_id])
+        if len(late) == n:
+            done.set()
+    sched = DeadlineScheduler(finalize)
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    for c in range(n):
+        due[c] = sched.schedule(c, DELAY + random.random() * 0.2)
+    for c in range(0, n, 2):
+        due[c] = sched.schedule(c, DELAY + random.random() * 0.2)
+    setup = (time.perf_counter() - t0) * 1000
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    await done.wait()
+    await sched.close()
+    _report("central", n, setup, peak, late)
+
+async def main(counts: list[int]):
+    print(f"{'mode':>10} {'chats':>7} {'setup ms':>9} {'peak KiB':>9} {'p50 late':>8} {'p99 late':>8} {'max late':>8}")
+    for n in counts:
+        await _per_task(n)
+        await _central(n)
+
+if __name__ == "__main__":
+    asyncio.run(main([int(x) for x in sys.argv[1:]] or [1000, 10000]))
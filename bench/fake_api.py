@@ -0,0 +1,40 @@
+"""A Bot API session that never leaves the process, shared by the benchmarks and the tests.
+
+    bot = Bot(token, session=FakeSession(latency=0.02))
+
+Every call is kept in ``calls`` and answered after ``latency`` seconds:
+sendMessage with the Message Telegram would have returned, getMe with a bot
+user, anything else with True. Subclasses override ``respond`` to answer
+more methods or to fail some calls.
+"""
+import asyncio
+from datetime import datetime, timezone
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import GetMe, SendMessage
+from aiogram.types import Chat, Message, User
+
+class FakeSession(BaseSession):
+    def __init__(self, latency: float = 0.0):
+        super().__init__()
+        self.latency = latency
+        self.calls: list = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.calls.append(method)
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return await self.respond(method)
+
+    async def respond(self, method):
+        if isinstance(method, SendMessage):
+            return Message(message_id=len(self.calls), date=datetime.now(timezone.utc),
+                           chat=Chat(id=method.chat_id, type="supergroup"), text=method.text)
+        if isinstance(method, GetMe):
+            return User(id=42, is_bot=True, first_name="trivia")
+        return True
+
+    async def stream_content(self, *a, **kw):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
@@ -0,0 +1,148 @@
+"""End-to-end load test: synthetic /quiz and /answer traffic through the real Dispatcher.
+
+Usage: python -m bench.load_test [--chats N] [--users M] [--api-latency MS] [--via command|button]
+
+Builds the Dispatcher exactly as src.bot does, but on a Bot whose HTTP
+session is faked (every API call returns after --api-latency ms). Each
+chat's admin sends /quiz, then M users answer (with /answer messages or
+keyboard taps, per --via); reports throughput and
+p50/p95/p99 latency per handler plus reveal latency. Runs against a
+throwaway SQLite file unless DATABASE_URL is set. Outbound pacing and the
+anti-spam limits are lifted so the numbers measure the bot, not Telegram's
+rate limits.
+"""
+import argparse, asyncio, os, random, sys, tempfile, time
+from datetime import datetime, timezone
+
+_tmp = tempfile.mkdtemp(prefix="trivia-load-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_tmp, 'load.sqlite3')}")
+os.environ.setdefault("BOT_TOKEN", "123456:load-test")
+os.environ.setdefault("ANSWER_JOURNAL", os.path.join(_tmp, "answers.journal"))
+os.environ.setdefault("ANSWER_SECONDS", "3")
+os.environ["ROUND_LEN"] = "1"
+for k in ("OUTBOX_GLOBAL_PER_SEC", "OUTBOX_PRIVATE_PER_SEC", "OUTBOX_GROUP_PER_MIN"):
+    os.environ.setdefault(k, "1000000")
+os.environ.setdefault("THROTTLE_USER", "default=0")
+os.environ.setdefault("THROTTLE_CHAT", "default=0")
+
+import orjson
+from aiogram import Bot
+from aiogram.methods import SendMessage, GetChatAdministrators
+from aiogram.types import Update, Message, Chat, User, ChatMemberOwner, CallbackQuery
+
+from src import bot as app
+from .fake_api import FakeSession
+
+ADMIN = 1
+
+class LoadSession(FakeSession):
+    """Notes when each chat's question went out and which buttons it carries."""
+
+    def __init__(self, latency: float):
+        super().__init__(latency)
+        self.question_sent: dict[int, float] = {}  # chat_id -> when the question went out
+        self.keyboards: dict[int, list[str]] = {}  # chat_id -> the question's callback_data per option
+        self.messages = 0
+
+    async def respond(self, method):
+        if isinstance(method, SendMessage):
+            self.messages += 1
+            if "\nA) " in method.text:
+                self.question_sent.setdefault(method.chat_id, time.perf_counter())
+                if method.reply_markup:
+                    self.keyboards[method.chat_id] = [b.callback_data for b in method.reply_markup.inline_keyboard[0]]
+        if isinstance(method, GetChatAdministrators):
+            return [ChatMemberOwner(user=User(id=ADMIN, is_bot=False, first_name="admin"), is_anonymous=False)]
+        return await super().respond(method)
+
+_update_id = 0
+
+def _update(chat_id: int, user_id: int, text: str) -> Update:
+    global _update_id
+    _update_id += 1
+    return Update(update_id=_update_id, message=Message(
+        message_id=_update_id, date=datetime.now(timezone.utc),
+        chat=Chat(id=chat_id, type="supergroup"),
+        from_user=User(id=user_id, is_bot=False, first_name=f"p{user_id}", username=f"p{user_id}"),
+        text=text,
+    ))
+
+def _tap(chat_id: int, user_id: int, data: str) -> Update:
+    global _update_id
+    _update_id += 1
+    user = User(id=user_id, is_bot=False, first_name=f"p{user_id}", username=f"p{user_id}")
+    return Update(update_id=_update_id, callback_query=CallbackQuery(
+        id=str(_update_id), from_user=user, chat_instance=str(chat_id), data=data,
+        message=Message(message_id=1, date=datetime.now(timezone.utc), chat=Chat(id=chat_id, type="supergroup")),
+    ))
+
+def _pct(xs: list[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))] * 1000 if xs else 0.0
+
+def _row(name: str, xs: list[float], wall: float):
+    print(f"{name:>14} {len(xs):>8} {len(xs) / wall:>10.0f} {_pct(xs, .5):>8.2f} {_pct(xs, .95):>8.2f} {_pct(xs, .99):>8.2f}")
+
+async def run(chats: int, users: int, latency: float, via: str = "command"):
+    app.ensure_db()
+    qfile = os.path.join(_tmp, "questions.json")
+    with open(qfile, "wb") as f:
+        f.write(orjson.dumps([{"prompt": f"Q{i}", "opt_a": "a", "opt_b": "b", "opt_c": "c", "opt_d": "d",
+                               "correct_opt": "A"} for i in range(200)]))
+    app.BANK.path = qfile
+
+    session = LoadSession(latency)
+    bot = Bot(app.settings.bot_token, session=session)
+    dp = app.build_dispatcher()
+    tasks = await app.on_startup(bot, run_scheduler=False)
+
+    reveal: list[float] = []
+    finalize = app._finalize_question
+    async def timed_finalize(chat_id):
+        t = time.perf_counter()
+        await finalize(chat_id)
+        reveal.append(time.perf_counter() - t)
+    app._finalize_question = timed_finalize
+
+    chat_ids = [-(1000 + c) for c in range(chats)]
+    t_quiz = time.perf_counter()
+    quiz_tasks = [asyncio.create_task(dp.feed_update(bot, _update(c, ADMIN, "/quiz"))) for c in chat_ids]
+    while len(session.question_sent) < chats:
+        await asyncio.sleep(0.005)
+    to_question = [session.question_sent[c] - t_quiz for c in chat_ids]
+
+    answers: list[float] = []
+    async def answer(c, u):
+        if via == "button":
+            upd = _tap(c, u, random.choice(session.keyboards[c]))
+        else:
+            upd = _update(c, u, f"/answer {random.choice('ABCD')}")
+        t = time.perf_counter()
+        await dp.feed_update(bot, upd)
+        answers.append(time.perf_counter() - t)
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(answer(c, 10_000 + u) for u in range(users) for c in chat_ids))
+    answer_wall = time.perf_counter() - t0
+
+    await asyncio.gather(*quiz_tasks)
+    await app.on_shutdown(tasks)
+
+    print(f"{chats} chats x {users} users via {via}, api latency {latency * 1000:.0f} ms, db {app.settings.database_url}")
+    print(f"{'handler':>14} {'count':>8} {'per sec':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    _row("quiz->question", to_question, max(to_question))
+    _row("answer", answers, answer_wall)
+    _row("reveal", reveal, max(sum(reveal), 1e-9))
+    print(f"api calls: {len(session.calls)} (chat messages: {session.messages})")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.load_test")
+    ap.add_argument("--chats", type=int, default=50)
+    ap.add_argument("--users", type=int, default=40)
+    ap.add_argument("--api-latency", type=float, default=20.0, help="fake Bot API round trip, ms")
+    ap.add_argument("--via", choices=("command", "button"), default="command", help="how players answer")
+    args = ap.parse_args(argv)
+    asyncio.run(run(args.chats, args.users, args.api_latency / 1000, args.via))
+
+if __name__ == "__main__":
+    sys.exit(main())
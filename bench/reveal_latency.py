@@ -0,0 +1,63 @@
+"""Reveal latency vs. answer count: per-user scoring vs. the vectorized, batched reveal.
+
+Usage: python -m bench.reveal_latency [answer counts...]
+Runs against a throwaway SQLite file (or DATABASE_URL if you export one).
+"""
+import os, random, sys, tempfile, time
+
+if not os.getenv("DATABASE_URL"):
+    _tmp = tempfile.mkdtemp(prefix="trivia-bench-")
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'bench.sqlite3')}"
+
+from sqlalchemy import select, delete
+
+from src.db import Base, engine, SessionLocal
+from src.models import User, Score
+from src.scoring import score_question
+
+WEEK = "2000-W01"
+
+def _seed(n: int) -> list[int]:
+    with SessionLocal() as s:
+        s.execute(delete(Score)); s.execute(delete(User))
+        s.add_all([User(tg_id=1_000_000 + i, username=f"u{i}") for i in range(n)])
+        s.commit()
+    return [1_000_000 + i for i in range(n)]
+
+def _per_user(tg_ids: list[int]):
+    # Mirrors the original reveal loop: 2 SELECTs and 1-2 commits per correct user.
+    with SessionLocal() as s:
+        for i, tg in enumerate(tg_ids):
+            u = s.execute(select(User).where(User.tg_id == tg)).scalar_one_or_none()
+            sc = s.execute(select(Score).where(Score.user_id == u.id, Score.week_key == WEEK)).scalar_one_or_none()
+            if not sc:
+                sc = Score(user_id=u.id, week_key=WEEK)
+                s.add(sc); s.commit()
+            sc.points += 10 + (3 if i == 0 else 0)
+            sc.correct += 1
+            s.commit()
+
+def _batched(tg_ids: list[int]):
+    now = time.time()
+    answers = {tg: ("A" if i % 4 else "B", now - random.random() * 20) for i, tg in enumerate(tg_ids)}
+    with SessionLocal() as s:
+        score_question(s, WEEK, answers, "A", now - 20, 20, 10)
+
+def _time(fn, tg_ids) -> float:
+    with SessionLocal() as s:
+        s.execute(delete(Score)); s.commit()
+    t0 = time.perf_counter()
+    fn(tg_ids)
+    return (time.perf_counter() - t0) * 1000
+
+def main(counts: list[int]):
+    Base.metadata.create_all(bind=engine)
+    print(f"{'answers':>8} {'per-user ms':>12} {'batched ms':>11} {'speedup':>8}")
+    for n in counts:
+        tg_ids = _seed(n)
+        slow = _time(_per_user, tg_ids)
+        fast = _time(_batched, tg_ids)
+        print(f"{n:>8} {slow:>12.1f} {fast:>11.1f} {slow / fast:>7.1f}x")
+
+if __name__ == "__main__":
+    main([int(x) for x in sys.argv[1:]] or [10, 100, 300, 1000, 3000])
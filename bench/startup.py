@@ -0,0 +1,108 @@
+"""Cold start: time from launching the bot process to handling its first update.
+
+Usage: python -m bench.startup [--runs N] [--api-latency MS]
+
+Each run starts a fresh interpreter that does what ``python -m src.bot``
+does (import, schema check, on_startup, start_polling) on a Bot whose HTTP
+session is faked (every call takes --api-latency ms, like a trip to
+Telegram): getUpdates hands out a single /help, and the run ends when its
+reply is sent. The first run starts from an empty database (so it
+includes creating the schema); the rest reuse it and are reported as a
+median. Times are ms since the process was spawned, so interpreter start
+and imports are included. Runs against a throwaway SQLite file unless
+DATABASE_URL is set.
+"""
+import argparse, asyncio, json, os, statistics, subprocess, sys, tempfile, time
+from datetime import datetime, timezone
+
+_PHASES = ("imported", "schema", "started", "first_update", "warm")
+
+def _child():
+    t0 = float(os.environ["STARTUP_T0"])
+    latency = float(os.environ["STARTUP_API_LATENCY"])
+    marks = {}
+    mark = lambda name: marks.setdefault(name, (time.time() - t0) * 1000)
+
+    from aiogram import Bot
+    from aiogram.methods import GetUpdates, SendMessage
+    from aiogram.types import Update, Message, Chat, User
+    from src import bot as app
+    from .fake_api import FakeSession
+    mark("imported")
+
+    class StartupSession(FakeSession):
+        """Hands out one /help, then long-polls forever; notes when its reply goes out."""
+
+        def __init__(self):
+            super().__init__(latency)
+            self.served = False
+            self.replied = asyncio.Event()
+
+        async def respond(self, method):
+            if isinstance(method, GetUpdates):
+                if self.served:
+                    await asyncio.sleep(3600)  # long poll with nothing new
+                self.served = True
+                return [Update(update_id=1, message=Message(
+                    message_id=1, date=datetime.now(timezone.utc), chat=Chat(id=-1, type="supergroup"),
+                    from_user=User(id=7, is_bot=False, first_name="p"), text="/help"))]
+            if isinstance(method, SendMessage):
+                mark("first_update")
+                self.replied.set()
+            return await super().respond(method)
+
+    async def run():
+        app.ensure_db()
+        mark("schema")
+        session = StartupSession()
+        bot = Bot(app.settings.bot_token, session=session)
+        dp = app.build_dispatcher()
+        tasks = await app.on_startup(bot, metrics_port=0)
+        mark("started")
+        tasks[1].add_done_callback(lambda _: mark("warm"))  # caches and scheduler
+
+        async def stop():
+            await session.replied.wait()
+            await asyncio.gather(tasks[1], return_exceptions=True)
+            await dp.stop_polling()
+
+        stopper = asyncio.create_task(stop())
+        # awaited straight after on_startup, as in src.bot.main
+        await dp.start_polling(bot, handle_signals=False)
+        await stopper
+        await app.on_shutdown(tasks)
+
+    asyncio.run(run())
+    print(json.dumps(marks))
+
+def _spawn(env: dict, latency: float) -> dict:
+    env = dict(env, STARTUP_API_LATENCY=repr(latency), STARTUP_T0=repr(time.time()))
+    out = subprocess.run([sys.executable, "-m", "bench.startup", "--child"], env=env,
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.startup")
+    ap.add_argument("--runs", type=int, default=5, help="runs against the existing schema")
+    ap.add_argument("--api-latency", type=float, default=50.0, help="fake Bot API round trip, ms")
+    ap.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        return _child()
+    tmp = tempfile.mkdtemp(prefix="trivia-startup-")
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tmp, 'startup.sqlite3')}")
+    env.setdefault("BOT_TOKEN", "123456:startup")
+    env.setdefault("ANSWER_JOURNAL", os.path.join(tmp, "answers.journal"))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    first = _spawn(env, args.api_latency / 1000)
+    rest = [_spawn(env, args.api_latency / 1000) for _ in range(args.runs)]
+    print(f"ms since spawn, api latency {args.api_latency:.0f} ms, db {env['DATABASE_URL']}")
+    print(f"{'run':>12} " + " ".join(f"{p:>13}" for p in _PHASES))
+    print(f"{'empty db':>12} " + " ".join(f"{first.get(p, float('nan')):>13.0f}" for p in _PHASES))
+    if rest:
+        print(f"{'median ' + str(len(rest)):>12} "
+              + " ".join(f"{statistics.median(r[p] for r in rest):>13.0f}" for p in _PHASES))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""Per-update cost of the throttling middleware.
+
+Usage: python -m bench.throttle [user counts...]
+Feeds /answer messages from N distinct users in one chat straight into
+ThrottleMiddleware with a no-op handler: first a pass where every update
+is allowed, then an immediate repeat burst that is mostly dropped.
+Reports microseconds per update and the number of tracked keys.
+"""
+import asyncio, os, sys, time
+from datetime import datetime, timezone
+
+os.environ.setdefault("BOT_TOKEN", "0:bench")
+
+from aiogram.types import Message, Chat, User
+
+from src.throttle import ThrottleMiddleware
+
+async def _noop(event, data):
+    return True
+
+async def _run(n: int):
+    mw = ThrottleMiddleware("answer=2/5,default=5/10", "answer=1000000/1,default=30/10")
+    chat = Chat(id=-100, type="supergroup")
+    now = datetime.now(timezone.utc)
+    msgs = [Message(message_id=i, date=now, chat=chat, text="/answer A",
+                    from_user=User(id=i, is_bot=False, first_name="p")) for i in range(n)]
+    for name in ("allowed", "burst"):
+        before = mw.dropped
+        t0 = time.perf_counter()
+        for _ in range(2 if name == "burst" else 1):
+            for m in msgs:
+                await mw(_noop, m, {})
+        calls = n * (2 if name == "burst" else 1)
+        us = (time.perf_counter() - t0) / calls * 1e6
+        print(f"{n:>8} {name:>8} {us:>9.2f} {mw.dropped - before:>8} {len(mw):>8}")
+
+def main(argv=None):
+    counts = [int(x) for x in (argv if argv is not None else sys.argv[1:])] or [1_000, 10_000, 100_000]
+    print(f"{'users':>8} {'pass':>8} {'us/update':>9} {'dropped':>8} {'keys':>8}")
+    for n in counts:
+        asyncio.run(_run(n))
+
+if __name__ == "__main__":
+    sys.exit(main())
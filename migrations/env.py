@@ -0,0 +1,26 @@
+from logging.config import fileConfig
+from alembic import context
+
+from src.db import Base, engine
+from src import models  # noqa: F401  (registers the tables on Base.metadata)
+
+if context.config.config_file_name is not None:
+    fileConfig(context.config.config_file_name)
+
+def run_migrations_offline():
+    context.configure(url=str(engine.url), target_metadata=Base.metadata,
+                      literal_binds=True, render_as_batch=True)
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    with engine.connect() as conn:
+        # batch mode lets SQLite "alter" tables by copying them
+        context.configure(connection=conn, target_metadata=Base.metadata, render_as_batch=True)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
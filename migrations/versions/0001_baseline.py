@@ -0,0 +1,73 @@
+"""Baseline: the schema as create_all built it before migrations (no later additions).
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("tg_id", sa.BigInteger, nullable=False),
+        sa.Column("username", sa.String(64)),
+        sa.Column("first_name", sa.String(64)),
+        sa.Column("last_name", sa.String(64)),
+        sa.Column("joined_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_users_tg_id", "users", ["tg_id"], unique=True)
+    op.create_table(
+        "questions",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("category", sa.String(64), nullable=False),
+        sa.Column("prompt", sa.String(512), nullable=False),
+        sa.Column("opt_a", sa.String(256), nullable=False),
+        sa.Column("opt_b", sa.String(256), nullable=False),
+        sa.Column("opt_c", sa.String(256), nullable=False),
+        sa.Column("opt_d", sa.String(256), nullable=False),
+        sa.Column("correct_opt", sa.String(1), nullable=False),
+    )
+    op.create_table(
+        "wallets",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False, unique=True),
+        sa.Column("address", sa.String(64), nullable=False),
+        sa.Column("verified", sa.Boolean, nullable=False),
+    )
+    op.create_index("ix_wallets_address", "wallets", ["address"])
+    op.create_table(
+        "scores",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("week_key", sa.String(10), nullable=False),
+        sa.Column("points", sa.Integer, nullable=False),
+        sa.Column("correct", sa.Integer, nullable=False),
+        sa.Column("wrong", sa.Integer, nullable=False),
+        sa.Column("streak", sa.Integer, nullable=False),
+        sa.Column("updated_at", sa.DateTime, nullable=False),
+        sa.UniqueConstraint("user_id", "week_key", name="uq_user_week"),
+    )
+    op.create_index("ix_scores_week_key", "scores", ["week_key"])
+    op.create_index("ix_scores_user_id", "scores", ["user_id"])
+    op.create_table(
+        "payouts",
+        sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+        sa.Column("week_key", sa.String(10), nullable=False),
+        sa.Column("user_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+        sa.Column("address", sa.String(64), nullable=False),
+        sa.Column("amount", sa.BigInteger, nullable=False),
+        sa.Column("tx_sig", sa.String(128)),
+        sa.Column("created_at", sa.DateTime, nullable=False),
+    )
+    op.create_index("ix_payouts_week_key", "payouts", ["week_key"])
+
+def downgrade():
+    for table in ("payouts", "scores", "wallets", "questions", "users"):
+        op.drop_table(table)
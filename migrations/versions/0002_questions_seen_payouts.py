@@ -0,0 +1,75 @@
+"""What the code added before migrations existed: question hashes, chat_seen, payout status.
+
+A database stamped at 0001 was built by create_all, possibly by a version
+that already had some of these, so each step checks before adding.
+Existing questions get their content hash (later duplicates are dropped);
+existing payout rows predate the status column and are marked sent.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from src.questions import content_hash
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+_OPTS = ("opt_a", "opt_b", "opt_c", "opt_d")
+
+def upgrade():
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+
+    if "content_hash" not in {c["name"] for c in insp.get_columns("questions")}:
+        op.add_column("questions", sa.Column("content_hash", sa.String(64)))
+        questions = sa.table("questions", sa.column("id"), sa.column("prompt"), sa.column("content_hash"),
+                             *(sa.column(o) for o in _OPTS))
+        seen, dupes = set(), []
+        for row in bind.execute(sa.select(questions).order_by(questions.c.id)).mappings():
+            h = content_hash(row["prompt"], [row[o] for o in _OPTS])
+            if h in seen:
+                dupes.append(row["id"])
+                continue
+            seen.add(h)
+            bind.execute(questions.update().where(questions.c.id == row["id"]).values(content_hash=h))
+        if dupes:
+            bind.execute(questions.delete().where(questions.c.id.in_(dupes)))
+        with op.batch_alter_table("questions") as batch:
+            batch.alter_column("content_hash", existing_type=sa.String(64), nullable=False)
+            batch.create_unique_constraint("uq_questions_content_hash", ["content_hash"])
+    if "ix_questions_category_id" not in {i["name"] for i in insp.get_indexes("questions")}:
+        op.create_index("ix_questions_category_id", "questions", ["category", "id"])
+
+    if not insp.has_table("chat_seen"):
+        op.create_table(
+            "chat_seen",
+            sa.Column("id", sa.Integer, primary_key=True, autoincrement=True),
+            sa.Column("chat_id", sa.BigInteger, nullable=False),
+            sa.Column("week_key", sa.String(10), nullable=False),
+            sa.Column("bits", sa.LargeBinary, nullable=False),
+            sa.UniqueConstraint("chat_id", "week_key", name="uq_chat_week"),
+        )
+
+    if "status" not in {c["name"] for c in insp.get_columns("payouts")}:
+        with op.batch_alter_table("payouts") as batch:
+            batch.add_column(sa.Column("status", sa.String(16), nullable=False, server_default="sent"))
+        with op.batch_alter_table("payouts") as batch:
+            batch.alter_column("status", existing_type=sa.String(16), server_default=None)
+    if "uq_payout_week_user" not in {u["name"] for u in insp.get_unique_constraints("payouts")}:
+        with op.batch_alter_table("payouts") as batch:
+            batch.create_unique_constraint("uq_payout_week_user", ["week_key", "user_id"])
+
+def downgrade():
+    with op.batch_alter_table("payouts") as batch:
+        batch.drop_constraint("uq_payout_week_user", type_="unique")
+        batch.drop_column("status")
+    op.drop_table("chat_seen")
+    op.drop_index("ix_questions_category_id", table_name="questions")
+    with op.batch_alter_table("questions") as batch:
+        batch.drop_constraint("uq_questions_content_hash", type_="unique")
+        batch.drop_column("content_hash")
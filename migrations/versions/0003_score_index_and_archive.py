@@ -0,0 +1,39 @@
+"""Leaderboard index on scores and a compact score_archive for closed weeks.
+
+(week_key, points DESC, user_id) serves every "top of the week" query
+without a sort, so the single-column week_key index (its prefix) and the
+user_id index (a prefix of uq_user_week) go. On Postgres the index also
+INCLUDEs the remaining stat columns so those queries are index-only.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index("ix_scores_week_points", "scores", ["week_key", sa.text("points DESC"), "user_id"],
+                    postgresql_include=["correct", "wrong", "streak"])
+    op.drop_index("ix_scores_week_key", table_name="scores")
+    op.drop_index("ix_scores_user_id", table_name="scores")
+    op.create_table(
+        "score_archive",
+        sa.Column("week_key", sa.String(10), primary_key=True),
+        sa.Column("user_id", sa.Integer, primary_key=True),
+        sa.Column("points", sa.Integer, nullable=False),
+        sa.Column("correct", sa.Integer, nullable=False),
+        sa.Column("wrong", sa.Integer, nullable=False),
+        sqlite_with_rowid=False,
+    )
+
+def downgrade():
+    op.drop_table("score_archive")
+    op.create_index("ix_scores_user_id", "scores", ["user_id"])
+    op.create_index("ix_scores_week_key", "scores", ["week_key"])
+    op.drop_index("ix_scores_week_points", table_name="scores")
@@ -0,0 +1,40 @@
+"""Incremental all-time/monthly/per-chat rollups.
+
+Earlier scores carry no chat, so only the all-chats all-time rows can be
+backfilled (from scores and score_archive).
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "stat_rollups",
+        sa.Column("period", sa.String(10), primary_key=True),
+        sa.Column("chat_id", sa.BigInteger, primary_key=True),
+        sa.Column("user_id", sa.Integer, primary_key=True),
+        sa.Column("points", sa.Integer, nullable=False),
+        sa.Column("correct", sa.Integer, nullable=False),
+        sa.Column("wrong", sa.Integer, nullable=False),
+        sqlite_with_rowid=False,
+    )
+    op.create_index("ix_rollups_top", "stat_rollups",
+                    ["period", "chat_id", sa.text("points DESC"), "user_id", "correct", "wrong"])
+    op.execute(
+        "INSERT INTO stat_rollups (period, chat_id, user_id, points, correct, wrong) "
+        "SELECT 'all', 0, user_id, SUM(points), SUM(correct), SUM(wrong) FROM ("
+        "  SELECT user_id, points, correct, wrong FROM scores"
+        "  UNION ALL SELECT user_id, points, correct, wrong FROM score_archive"
+        ") AS history GROUP BY user_id"
+    )
+
+def downgrade():
+    op.drop_table("stat_rollups")
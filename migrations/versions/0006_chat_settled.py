@@ -0,0 +1,23 @@
+"""Newest scored question per chat, so journal replays never score twice.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table(
+        "chat_settled",
+        sa.Column("chat_id", sa.BigInteger, primary_key=True, autoincrement=False),
+        sa.Column("deadline_ms", sa.BigInteger, nullable=False),
+    )
+
+def downgrade():
+    op.drop_table("chat_settled")
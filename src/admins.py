@@ -0,0 +1,54 @@
+import asyncio, time
+from aiogram import Bot
+from aiogram.types import ChatMemberUpdated
+
+class AdminCache:
+    """chat_id -> admin user ids, from one get_chat_administrators call per TTL.
+
+    ``chat_member``/``my_chat_member`` updates drop the chat's entry, so a
+    promotion or demotion is seen on the next check rather than after the TTL.
+    Concurrent misses for one chat share a single API call.
+    """
+
+    def __init__(self, ttl: float = 600.0):
+        self.ttl = ttl
+        self._chats: dict[int, tuple[float, frozenset[int]]] = {}  # chat_id -> (expires, admin ids)
+        self._loading: dict[int, asyncio.Future] = {}
+        self.hits = self.misses = 0
+
+    async def admins(self, bot: Bot, chat_id: int) -> frozenset[int]:
+        e = self._chats.get(chat_id)
+        if e is not None and e[0] > time.monotonic():
+            self.hits += 1
+            return e[1]
+        self.misses += 1
+        pending = self._loading.get(chat_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = self._loading[chat_id] = asyncio.get_running_loop().create_future()
+        try:
+            members = await bot.get_chat_administrators(chat_id)
+            ids = frozenset(m.user.id for m in members)
+            self._chats[chat_id] = (time.monotonic() + self.ttl, ids)
+            fut.set_result(ids)
+            return ids
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()
+            raise
+        finally:
+            if not fut.done():
+                fut.cancel()
+            del self._loading[chat_id]
+
+    async def is_admin(self, bot: Bot, chat_id: int, user_id: int) -> bool:
+        return user_id in await self.admins(bot, chat_id)
+
+    def invalidate(self, chat_id: int):
+        self._chats.pop(chat_id, None)
+
+    async def on_member_update(self, event: ChatMemberUpdated):
+        self.invalidate(event.chat.id)
+
+    def stats(self) -> str:
+        return f"chats={len(self._chats)} hits={self.hits} misses={self.misses}"
@@ -0,0 +1,63 @@
+"""Move closed weeks out of ``scores`` into the compact ``score_archive`` table.
+
+    python -m src.archive [--keep N] [--week 2025-W35 ...]
+
+Archived rows keep only the final points/correct/wrong, keyed by
+(week_key, user_id), so ``scores`` holds just the weeks still being played
+and its indexes stay small. Archiving a week twice (e.g. after a mid-week
+/admin reset) adds the new totals onto the archived ones.
+"""
+import argparse, sys
+from datetime import datetime, timezone
+from sqlalchemy import select, delete, distinct
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal, dialect_insert
+from .models import Score, ScoreArchive, StatRollup
+
+def closed_weeks(session: Session, current_week: str, keep: int = 1) -> list[str]:
+    """Weeks in ``scores`` other than the ``keep`` most recent up to ``current_week``."""
+    weeks = sorted(session.execute(select(distinct(Score.week_key))).scalars())
+    live = [w for w in weeks if w <= current_week][-keep:] if keep > 0 else []
+    return [w for w in weeks if w not in live and w < current_week]
+
+def archive_weeks(session: Session, weeks: list[str], drop_rollups: bool = False) -> int:
+    """Copy the weeks' scores into ``score_archive`` and delete them, in one transaction.
+
+    ``drop_rollups`` also deletes the weeks' per-chat rollup rows, for an
+    admin reset that must clear every view of the week.
+    """
+    if not weeks:
+        return 0
+    insert = dialect_insert(session.get_bind())
+    cols = ["week_key", "user_id", "points", "correct", "wrong"]
+    src = select(Score.week_key, Score.user_id, Score.points, Score.correct, Score.wrong).where(Score.week_key.in_(weeks))
+    stmt = insert(ScoreArchive).from_select(cols, src)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[ScoreArchive.week_key, ScoreArchive.user_id],
+        set_={
+            "points": ScoreArchive.points + stmt.excluded.points,
+            "correct": ScoreArchive.correct + stmt.excluded.correct,
+            "wrong": ScoreArchive.wrong + stmt.excluded.wrong,
+        },
+    )
+    session.execute(stmt)
+    moved = session.execute(delete(Score).where(Score.week_key.in_(weeks))).rowcount
+    if drop_rollups:
+        session.execute(delete(StatRollup).where(StatRollup.period.in_(weeks)))
+    session.commit()
+    return moved
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.archive", description="Archive closed weeks of scores.")
+    ap.add_argument("--keep", type=int, default=1, help="most recent weeks to leave in scores (default: current)")
+    ap.add_argument("--week", action="append", default=[], help="archive exactly these weeks instead")
+    args = ap.parse_args(argv)
+    y, w, _ = datetime.now(timezone.utc).isocalendar()
+    with SessionLocal() as s:
+        weeks = args.week or closed_weeks(s, f"{y}-W{w:02d}", args.keep)
+        moved = archive_weeks(s, weeks)
+    print(f"archived {moved} score rows from {len(weeks)} week(s): {', '.join(weeks) or '-'}")
+
+if __name__ == "__main__":
+    sys.exit(main())
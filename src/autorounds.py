@@ -0,0 +1,171 @@
+"""Recurring rounds per chat, dispatched by APScheduler under a load-aware cap.
+
+Each row of ``round_schedules`` becomes an interval job. The first run lands at
+a random point inside the interval and every run is jittered, so hundreds of
+chats on the same schedule don't all start on the same minute. A scheduled
+round also needs a slot from ``RoundGate``, a cap on rounds running at once in
+this process. The cap is halved while the outbox backlog or finalize latency
+is over its target, and grows back by one slot at a time once both are under
+it. The latency average fades with a half-life when no reveals come in, so
+one slow reveal can't hold the cap down for good. A run that can't get a
+slot within half its interval is skipped.
+"""
+import asyncio, logging, random, time
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable
+from sqlalchemy import select, delete
+
+from .db import AsyncSessionLocal, dialect_insert
+from .models import RoundSchedule
+
+log = logging.getLogger(__name__)
+
+class RoundGate:
+    """Counts running rounds; scheduled ones start only while under ``cap``."""
+
+    def __init__(self, max_active: int, min_active: int, outbox_target: int, finalize_target: float,
+                 outbox_depth: Callable[[], int], adjust_every: float = 5.0, finalize_half_life: float = 30.0):
+        self.max_active = max(1, max_active)
+        self.min_active = max(1, min(min_active, self.max_active))
+        self.outbox_target = outbox_target
+        self.finalize_target = finalize_target
+        self.outbox_depth = outbox_depth
+        self.adjust_every = adjust_every
+        self.cap = self.max_active
+        self.active = 0
+        self.finalize_half_life = finalize_half_life
+        self.finalize_ewma = 0.0  # seconds from deadline to reveal sent, smoothed
+        self._decayed_at = time.monotonic()
+        self._next_adjust = 0.0
+        self.started = self.skipped = self.shrinks = 0
+
+    def _decay(self, now: float):
+        self.finalize_ewma *= 0.5 ** ((now - self._decayed_at) / self.finalize_half_life)
+        self._decayed_at = now
+
+    def observe_finalize(self, seconds: float):
+        """Deadline-to-reveal time of a question this process opened and timed."""
+        self._decay(time.monotonic())
+        self.finalize_ewma += 0.2 * (seconds - self.finalize_ewma)
+
+    def _adjust(self, now: float):
+        if now < self._next_adjust:
+            return
+        self._next_adjust = now + self.adjust_every
+        self._decay(now)
+        if self.outbox_depth() > self.outbox_target or self.finalize_ewma > self.finalize_target:
+            if self.cap > self.min_active:
+                self.cap = max(self.min_active, self.cap // 2)
+                self.shrinks += 1
+        elif self.cap < self.max_active:
+            self.cap += 1
+
+    def try_acquire(self) -> bool:
+        self._adjust(time.monotonic())
+        if self.active >= self.cap:
+            return False
+        self.active += 1
+        return True
+
+    async def acquire(self, timeout: float) -> bool:
+        """Wait (with jittered retries) up to ``timeout`` seconds for a slot."""
+        give_up = time.monotonic() + timeout
+        while not self.try_acquire():
+            if time.monotonic() >= give_up:
+                self.skipped += 1
+                return False
+            await asyncio.sleep(random.uniform(0.5, 2.0))
+        self.started += 1
+        return True
+
+    def claim(self):
+        """A round started by hand: counted against the cap, never refused."""
+        self.active += 1
+
+    def release(self):
+        self.active -= 1
+
+    def stats(self) -> str:
+        return (f"active={self.active} cap={self.cap}/{self.max_active} finalize={self.finalize_ewma:.1f}s "
+                f"started={self.started} skipped={self.skipped} shrinks={self.shrinks}")
+
+class AutoRounds:
+    """Keeps one APScheduler job per scheduled chat this process owns."""
+
+    def __init__(self, gate: RoundGate, run_round: Callable[[int, int], Awaitable[bool]], jitter: float = 60.0):
+        self.gate = gate
+        self.run_round = run_round  # (chat_id, questions) -> False if the chat already had a round going
+        self.jitter = jitter
+        self.owns: Callable[[int], bool] = lambda chat_id: True  # webhook workers narrow this to their shard
+        self._sched = None
+        self._jobs: dict[int, tuple[int, int]] = {}  # chat_id -> (every_minutes, questions)
+
+    async def start(self, sched):
+        self._sched = sched
+        async with AsyncSessionLocal() as s:
+            rows = (await s.execute(select(RoundSchedule.chat_id, RoundSchedule.every_minutes,
+                                           RoundSchedule.questions))).all()
+        for chat_id, every, questions in rows:
+            if self.owns(chat_id):
+                self.apply(chat_id, every, questions)
+        log.info("auto-rounds: %d chat(s) scheduled", len(self._jobs))
+
+    def apply(self, chat_id: int, every: int | None, questions: int = 0):
+        """(Re)schedule a chat's job, or drop it when ``every`` is None."""
+        if self._sched is None:
+            return
+        job_id = f"round:{chat_id}"
+        if every is None:
+            if self._jobs.pop(chat_id, None) is not None:
+                self._sched.remove_job(job_id)
+            return
+        from apscheduler.triggers.interval import IntervalTrigger
+        period = every * 60
+        first = datetime.now(timezone.utc) + timedelta(seconds=random.uniform(0, period))
+        trigger = IntervalTrigger(seconds=period, start_date=first, jitter=min(self.jitter, period / 4),
+                                  timezone="UTC")
+        self._sched.add_job(self._run, trigger, args=[chat_id, questions], id=job_id, replace_existing=True,
+                            max_instances=1, coalesce=True, misfire_grace_time=period // 2)
+        self._jobs[chat_id] = (every, questions)
+
+    def get(self, chat_id: int) -> tuple[int, int] | None:
+        return self._jobs.get(chat_id)
+
+    async def _run(self, chat_id: int, questions: int):
+        every, _ = self._jobs.get(chat_id, (0, 0))
+        if not await self.gate.acquire(timeout=every * 30):
+            log.info("auto-round for %s skipped: %s", chat_id, self.gate.stats())
+            return
+        try:
+            await self.run_round(chat_id, questions)
+        except Exception:
+            log.exception("auto-round for %s failed", chat_id)
+        finally:
+            self.gate.release()
+
+    def close(self):
+        if self._sched is not None:
+            self._sched.shutdown(wait=False)
+            self._sched = None
+        self._jobs.clear()
+
+    def __len__(self):
+        return len(self._jobs)
+
+async def save_schedule(chat_id: int, every: int, questions: int, set_by: int):
+    async with AsyncSessionLocal() as s:
+        insert = dialect_insert(s.bind)
+        stmt = insert(RoundSchedule).values(chat_id=chat_id, every_minutes=every, questions=questions,
+                                            set_by=set_by, updated_at=datetime.utcnow())
+        await s.execute(stmt.on_conflict_do_update(
+            index_elements=[RoundSchedule.chat_id],
+            set_={"every_minutes": every, "questions": questions, "set_by": set_by,
+                  "updated_at": stmt.excluded.updated_at},
+        ))
+        await s.commit()
+
+async def clear_schedule(chat_id: int) -> bool:
+    async with AsyncSessionLocal() as s:
+        n = (await s.execute(delete(RoundSchedule).where(RoundSchedule.chat_id == chat_id))).rowcount
+        await s.commit()
+    return bool(n)
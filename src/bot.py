@@ -1,49 +1,89 @@
-import asyncio, time
+import asyncio, gc, logging, time
 from datetime import datetime, timezone
-from aiogram import Bot, Dispatcher
+from aiogram import Bot, Dispatcher, F
 from aiogram.filters import Command, CommandStart
-from aiogram.types import Message
-from aiogram.enums import ChatMemberStatus
-from sqlalchemy import select, desc
-from sqlalchemy.orm import Session
+from aiogram.types import Message, CallbackQuery, ChatMemberUpdated, InlineKeyboardMarkup, InlineKeyboardButton
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from .utils.config import settings
-from .db import Base, engine, SessionLocal
-from .models import User, Score, Wallet
-from .trivia import fetch_music_questions
-from .scheduler import schedule_jobs
-from .solana_payouts import PayoutClient
+from .db import engine, async_engine, AsyncSessionLocal, ensure_schema
+from .models import Score, Wallet
+from .trivia import BANK, fetch_music_questions
+from .scoring import score_question
+from .identity import UserCache
+from .admins import AdminCache
+from .leaderboard import Leaderboards, display_name, render_rows
+from .rollups import ALL_CHATS, ALL_TIME, month_key, top as rollup_top
+from .outbox import Outbox
+from .timers import DeadlineScheduler
+from .round_store import make_round_store
+from .journal import AnswerJournal
+from .autorounds import AutoRounds, RoundGate, clear_schedule, save_schedule
+from . import metrics
+from .metrics import METRICS, MetricsMiddleware
+from .throttle import ThrottleMiddleware
 
 import html
 
+log = logging.getLogger(__name__)
+
 def esc(s: object) -> str:
     """Escape text for safe HTML in Telegram messages."""
     return html.escape(str(s), quote=True)
 
 async def is_admin(bot: Bot, chat_id: int, user_id: int) -> bool:
-    member = await bot.get_chat_member(chat_id, user_id)
-    return member.status in (
-        ChatMemberStatus.ADMINISTRATOR,
-        ChatMemberStatus.CREATOR,
-    )
+    return await ADMINS.is_admin(bot, chat_id, user_id)
 
 HELP = (
     "🎵 *Blue Strips Trivia Bot*\n"
     "• /join — enter this week's contest\n"
     "• /quiz — start a mini round\n"
-    "• /answer A|B|C|D — answer current Q\n"
-    "• /leaderboard — weekly top\n"
+    "• tap A–D under a question (or /answer A|B|C|D) — answer it\n"
+    "• /leaderboard [all|month|chat] — weekly top, or all-time / monthly / this chat\n"
     "• /myscore — your stats\n"
     "• /wallet <address> — set SOL wallet for payouts\n"
+    "• /schedule <minutes> [questions] | off — admins: recurring rounds here\n"
     "• /rules — scoring rules\n"
     "• /help — command list\n"
     "Admins: /admin status | endweek | payout | reset"
 )
 
-# Per-chat round state:
-# chat_id -> {"correct": "A", "deadline": ts, "answers": {tg_id: (choice, ts)}, "task": asyncio.Task}
-CURRENT_ROUND = {}
-LOCKED_CHATS = set()
+# Per-chat round state (open question, epoch deadline, answers) and round locks;
+# in memory by default, or shared between worker processes via ROUND_STORE=sqlite:<path>.
+ROUNDS = make_round_store(settings.round_store)
+# Every question/answer is journaled (fsync'd in batches) so a crash mid-round can be replayed.
+JOURNAL = AnswerJournal(settings.answer_journal) if settings.answer_journal else None
+# chat_id -> future resolved when the chat's current question has been revealed (process-local)
+REVEALED: dict[int, asyncio.Future] = {}
+# tg_id -> user id/profile; profile edits are written back by a periodic flusher.
+USER_CACHE = UserCache(settings.user_cache_size)
+# chat_id -> admin ids for the /quiz check; dropped on chat_member updates.
+ADMINS = AdminCache(settings.admin_cache_ttl)
+# week_key -> sorted standings, seeded from scores and kept current by the reveal.
+LEADERBOARDS = Leaderboards(max_age=settings.leaderboard_max_age)
+# Every round-related send goes through here, on the one Bot session created in main().
+OUTBOX = Outbox()
+# Single heap-based timer for every chat's question deadline; fires _finalize_question.
+DEADLINES = DeadlineScheduler(lambda chat_id: _finalize_question(chat_id))
+# Drops command spam per sender/chat before any handler (and its DB work) runs.
+THROTTLE = ThrottleMiddleware(settings.throttle_user, settings.throttle_chat)
+# Rounds running in this process; scheduled ones wait for a slot while the outbox or reveals lag.
+GATE = RoundGate(settings.auto_round_max_active, settings.auto_round_min_active,
+                 settings.auto_round_outbox_target, settings.auto_round_finalize_target, OUTBOX.depth)
+# chat_id -> recurring round job, loaded from round_schedules and run by the APScheduler instance.
+AUTOROUNDS = AutoRounds(GATE, lambda chat_id, n: _run_round(chat_id, n), settings.auto_round_jitter)
+
+METRICS.instrument(engine, async_engine.sync_engine)
+METRICS.gauge("trivia_active_rounds", "Questions open in this process.", lambda: len(REVEALED))
+METRICS.gauge("trivia_pending_finalizes", "Question deadlines waiting to fire.", DEADLINES.pending)
+METRICS.gauge("trivia_outbox_depth", "Messages queued for sending.", OUTBOX.depth)
+METRICS.gauge("trivia_throttled_total", "Commands dropped by the rate limiter.", lambda: THROTTLE.dropped, "counter")
+METRICS.gauge("trivia_rounds_running", "Rounds (manual and scheduled) running in this process.", lambda: GATE.active)
+METRICS.gauge("trivia_round_cap", "Current cap on running rounds for scheduled starts.", lambda: GATE.cap)
+METRICS.gauge("trivia_scheduled_chats", "Chats with auto-rounds in this process.", lambda: len(AUTOROUNDS))
+METRICS.gauge("trivia_auto_rounds_skipped_total", "Scheduled rounds skipped for want of a slot.",
+              lambda: GATE.skipped, "counter")
 
 def week_key():
     now = datetime.now(timezone.utc)
@@ -51,29 +91,17 @@ def week_key():
     return f"{y}-W{w:02d}"
 
 def ensure_db():
-    Base.metadata.create_all(bind=engine)
-
-def get_or_create_user(session: Session, msg: Message) -> User:
-    u = session.execute(select(User).where(User.tg_id==msg.from_user.id)).scalar_one_or_none()
-    if u: 
-        # keep username up to date
-        u.username = msg.from_user.username
-        session.commit()
-        return u
-    u = User(
-        tg_id=msg.from_user.id,
-        username=msg.from_user.username,
-        first_name=msg.from_user.first_name,
-        last_name=msg.from_user.last_name
-    )
-    session.add(u); session.commit()
-    return u
+    ensure_schema(settings.db_auto_migrate)
 
-def get_or_create_score(session: Session, user: User) -> Score:
-    s = session.execute(select(Score).where(Score.user_id==user.id, Score.week_key==week_key())).scalar_one_or_none()
+async def get_user_id(msg: Message) -> int:
+    """Internal user id for the sender; served from USER_CACHE without DB I/O on a hit."""
+    return await USER_CACHE.resolve(msg.from_user)
+
+async def get_or_create_score(session: AsyncSession, user_id: int) -> Score:
+    s = (await session.execute(select(Score).where(Score.user_id==user_id, Score.week_key==week_key()))).scalar_one_or_none()
     if s: return s
-    s = Score(user_id=user.id, week_key=week_key())
-    session.add(s); session.commit()
+    s = Score(user_id=user_id, week_key=week_key())
+    session.add(s); await session.commit()
     return s
 
 async def cmd_start(msg: Message):
@@ -85,16 +113,21 @@ async def cmd_help(msg: Message):
 async def cmd_rules(msg: Message):
     txt = (
         f"Scoring:\n"
-        f"• Correct +10, Time bonus up to +5, Streak bonus +2 per correct (cap {settings.streak_bonus_cap}).\n"
+        f"• Correct +10, Time bonus up to +5 (faster = more), Streak bonus +2 per correct in a row (cap {settings.streak_bonus_cap}).\n"
+        f"• Wrong answers score 0 and reset your streak.\n"
         f"• Answer window: {settings.answer_seconds}s per question.\n"
         f"Use /answer A|B|C|D"
     )
     await msg.answer(txt)
 
 async def cmd_join(msg: Message):
-    with SessionLocal() as s:
-        user = get_or_create_user(s, msg)
-        get_or_create_score(s, user)
+    user_id = await get_user_id(msg)
+    wk = week_key()
+    async with AsyncSessionLocal() as s:
+        sc = await get_or_create_score(s, user_id)
+    board = await LEADERBOARDS.get(wk)
+    board.update(user_id, sc.points, sc.correct, sc.wrong, sc.streak,
+                 display_name(msg.from_user.username, msg.from_user.id))
     await msg.answer("You're in for this week! Use /quiz to start a round.")
 
 async def cmd_wallet(msg: Message):
@@ -104,35 +137,47 @@ async def cmd_wallet(msg: Message):
     addr = parts[1]
     if not (32 <= len(addr) <= 44):
         return await msg.answer("That doesn't look like a valid Solana address.")
-    with SessionLocal() as s:
-        user = get_or_create_user(s, msg)
-        w = s.execute(select(Wallet).where(Wallet.user_id==user.id)).scalar_one_or_none()
+    user_id = await get_user_id(msg)
+    async with AsyncSessionLocal() as s:
+        w = (await s.execute(select(Wallet).where(Wallet.user_id==user_id))).scalar_one_or_none()
         if w:
             w.address = addr
         else:
-            w = Wallet(user_id=user.id, address=addr, verified=False)
+            w = Wallet(user_id=user_id, address=addr, verified=False)
             s.add(w)
-        s.commit()
+        await s.commit()
     await msg.answer("Wallet saved ✅")
 
 async def cmd_quiz(msg: Message, bot: Bot):
     # Restrict quiz start to admins only
     if msg.chat.type in ("group", "supergroup"):
         if not await is_admin(bot, msg.chat.id, msg.from_user.id):
-            return await msg.answer("🚫 Only group admins can start a quiz.")
-    if msg.chat.id in LOCKED_CHATS:
-        return await msg.answer("A round is already in progress. Finish it or wait a moment.")
-    LOCKED_CHATS.add(msg.chat.id)
+            OUTBOX.send(msg.chat.id, "🚫 Only group admins can start a quiz.", ack="not_admin")
+            return
+    GATE.claim()
+    try:
+        started = await _run_round(msg.chat.id, settings.round_len)
+    finally:
+        GATE.release()
+    if not started:
+        await msg.answer("A round is already in progress. Finish it or wait a moment.")
+
+async def _run_round(chat_id: int, n: int) -> bool:
+    """Ask ``n`` questions, each after the last is revealed; False if the chat already has a round."""
+    # a lock left behind by a crashed worker expires after the longest a round could take
+    if not await ROUNDS.try_lock(chat_id, ttl=n * (settings.answer_seconds + 30)):
+        return False
     try:
-        n = settings.round_len
-        qs = await fetch_music_questions(n)
-        await msg.answer(f"Starting a {n}-question round. Use /answer A|B|C|D within {settings.answer_seconds}s.")
+        qs = await fetch_music_questions(n, chat_id=chat_id)
+        OUTBOX.send(chat_id, f"Starting a {n}-question round. Use /answer A|B|C|D within {settings.answer_seconds}s.")
         for q in qs:
-            await _ask_question(msg, q)
+            done = await _ask_question(chat_id, q)
+            await done  # next question only after this one is revealed
     finally:
-        LOCKED_CHATS.discard(msg.chat.id)
+        await ROUNDS.unlock(chat_id)
+    return True
 
-async def _ask_question(msg: Message, q: dict):
+async def _ask_question(chat_id: int, q: dict) -> asyncio.Future:
     mapping = q["options"]
     lines = [
         f"*{q['prompt']}*",
@@ -141,65 +186,78 @@ async def _ask_question(msg: Message, q: dict):
         f"C) {mapping['C']}",
         f"D) {mapping['D']}",
         "",
-        f"_You have {settings.answer_seconds}s. Use_ `/answer A|B|C|D`",
+        f"_You have {settings.answer_seconds}s. Tap an option or use_ `/answer A|B|C|D`",
     ]
+    # identifies this question in the keyboard's callback data, so taps on an old keyboard are refused
+    tag = str(time.time_ns() // 1_000_000)
+    # the window opens once the question is out, not while it waits in the outbox
+    await OUTBOX.send(chat_id, "\n".join(lines), parse_mode="Markdown", reply_markup=_answer_keyboard(tag))
     deadline = time.time() + settings.answer_seconds
-
-    # cancel any existing finalize task for this chat
-    old = CURRENT_ROUND.get(msg.chat.id)
-    if old and old.get("task"):
-        try:
-            old["task"].cancel()
-        except Exception:
-            pass
-
-    CURRENT_ROUND[msg.chat.id] = {
-        "correct": q["correct_opt"],
-        "deadline": deadline,
-        "answers": {},  # {tg_id: (choice, ts)}
-        "task": asyncio.create_task(_finalize_question_after(msg.chat.id, msg.chat.type)),
-    }
-
-    await msg.answer("\n".join(lines), parse_mode="Markdown")
-    
-async def _finalize_question_after(chat_id: int, chat_type: str):
+    await ROUNDS.start_question(chat_id, q["correct_opt"], deadline, tag)
+    if JOURNAL:
+        JOURNAL.question(chat_id, q["correct_opt"], deadline, tag)
+    # re-arming the chat's deadline supersedes any pending finalize for it
+    DEADLINES.schedule(chat_id, settings.answer_seconds)
+    old = REVEALED.get(chat_id)
+    if old and not old.done():
+        old.cancel()
+    done = REVEALED[chat_id] = asyncio.get_running_loop().create_future()
+    return done
+
+def _question_tag(round_state: dict) -> str:
+    # questions opened before tags were stored carried their epoch deadline
+    return round_state.get("tag") or str(int(round_state["deadline"] * 1000))
+
+def _answer_keyboard(tag: str) -> InlineKeyboardMarkup:
+    return InlineKeyboardMarkup(inline_keyboard=[[
+        InlineKeyboardButton(text=c, callback_data=f"ans:{tag}:{c}") for c in "ABCD"
+    ]])
+
+async def _finalize_question(chat_id: int):
+    """Called by DEADLINES once a question's answer window has closed."""
+    done = REVEALED.pop(chat_id, None)
     try:
-        await asyncio.sleep(settings.answer_seconds)
-    except asyncio.CancelledError:
-        return
+        round_state = await ROUNDS.finish(chat_id)
+        if round_state:
+            await _reveal(chat_id, round_state)
+            if done is not None:
+                # replayed or re-armed questions would count the downtime as reveal latency
+                GATE.observe_finalize(time.time() - round_state["deadline"])
+        if JOURNAL:
+            JOURNAL.settled(chat_id)
+    finally:
+        if done and not done.done():
+            done.set_result(None)
 
-    round_state = CURRENT_ROUND.get(chat_id)
-    if not round_state:
-        return
+async def _reveal(chat_id: int, round_state: dict):
 
     correct = round_state["correct"]
     answers = round_state["answers"]  # {tg_id: (choice, ts)}
 
-    # Everyone who chose the correct option
+    # Everyone who chose the correct option, fastest first
     correct_users = [(uid, ts) for uid, (choice, ts) in answers.items() if choice == correct]
-    # Earliest first for the +3 bonus
     correct_users.sort(key=lambda x: x[1])
 
-    awarded = []
-    with SessionLocal() as s:
-        for i, (user_id, _) in enumerate(correct_users):
-            u = s.execute(select(User).where(User.tg_id == user_id)).scalar_one_or_none()
-            if not u:
-                continue
-            sc = s.execute(
-                select(Score).where(Score.user_id == u.id, Score.week_key == week_key())
-            ).scalar_one_or_none()
-            if not sc:
-                sc = Score(user_id=u.id, week_key=week_key())
-                s.add(sc)
-                s.commit()
-
-            # +10 for all correct, +3 extra for the FIRST correct
-            pts = 10 + (3 if i == 0 else 0)
-            sc.points += pts
-            sc.correct += 1
-            s.commit()
-            awarded.append((u, pts))
+    wk = week_key()
+    window = settings.answer_seconds
+    async with AsyncSessionLocal() as s:
+        # base + time bonus + streak bonus for every answer in one vectorized pass, then one upsert
+        scored = await s.run_sync(
+            score_question, wk, answers, correct, round_state["deadline"] - window, window,
+            settings.streak_bonus_cap, chat_id, int(round_state["deadline"] * 1000))
+    if scored is None:
+        # replayed from the journal, but its scores were committed before the crash: announce only
+        OUTBOX.send(chat_id, f"⏰ Time! Correct answer: <b>{esc(correct)}</b>\n"
+                             f"Answered: {len(answers)} • Correct: {len(correct_users)} (scored before a restart)",
+                    parse_mode="HTML")
+        return
+    users, points, totals = scored
+    awarded = [(users[tg], points[users[tg].id]) for tg, _ in correct_users if tg in users]
+
+    board = await LEADERBOARDS.get(wk)
+    names = {u.id: display_name(u.username, u.tg_id) for u in users.values()}
+    for uid, (points, n_correct, n_wrong, streak) in totals.items():
+        board.update(uid, points, n_correct, n_wrong, streak, names.get(uid))
 
     # Build the summary message (escaped for HTML safety)
     total = len(answers)
@@ -210,75 +268,145 @@ async def _finalize_question_after(chat_id: int, chat_type: str):
     ]
     if awarded:
         for u, pts in awarded[:12]:
-            name = f"@{u.username}" if u.username else str(u.tg_id)
-            lines.append(f"✅ {esc(name)} (+{pts})")
+            lines.append(f"✅ {esc(display_name(u.username, u.tg_id))} (+{pts})")
         if len(awarded) > 12:
             lines.append(f"...and {len(awarded)-12} more")
     else:
         lines.append("No correct answers this round.")
 
-    # Send message safely
-    from aiogram import Bot
-    try:
-        async with Bot(settings.bot_token) as bot:
-            await bot.send_message(chat_id, "\n".join(lines), parse_mode="HTML")
-    except Exception:
-        pass
-
-    # Clear round state
-    CURRENT_ROUND.pop(chat_id, None)
+    # Queued, rate-limited and retried on 429 by the outbox
+    OUTBOX.send(chat_id, "\n".join(lines), parse_mode="HTML")
 
 async def cmd_answer(msg: Message):
     parts = (msg.text or "").split()
     if len(parts) != 2 or parts[1].upper() not in ("A", "B", "C", "D"):
         return await msg.answer("Usage: /answer <A|B|C|D>")
 
-    choice = parts[1].upper()
-    st = CURRENT_ROUND.get(msg.chat.id)
-    if not st:
+    result = await _record_answer(msg.chat.id, msg.from_user, parts[1].upper())
+    if result == "none":
         return await msg.answer("No active question. Use /quiz to start.")
+    if result == "late":
+        OUTBOX.send(msg.chat.id, "Too late—time is up. Wait for the next question.", ack="late")
+    elif result == "dupe":
+        OUTBOX.send(msg.chat.id, "You already locked in an answer for this question.", ack="dupe")
+    else:
+        OUTBOX.send(msg.chat.id, "✅ Answer locked in. Wait for the reveal!", ack="locked",
+                    ack_many="✅ {n} answers locked in. Wait for the reveal!")
 
-    if time.time() > st["deadline"]:
-        return await msg.answer("Too late—time is up. Wait for the next question.")
+async def _record_answer(chat_id: int, from_user, choice: str, tag: str | None = None) -> str:
+    """Record a player's choice; returns "locked", "dupe", "late" or "none" (no open question)."""
+    st = await ROUNDS.get(chat_id)
+    if not st or (tag is not None and tag != _question_tag(st)):
+        return "none"
 
-    # Capture primitive user id INSIDE the session (prevents DetachedInstanceError)
-    with SessionLocal() as s:
-        user = get_or_create_user(s, msg)
-        tg_id = int(user.tg_id)
+    # the local monotonic timer is authoritative; the epoch deadline covers a round armed elsewhere
+    remaining = DEADLINES.remaining(chat_id)
+    if remaining is None:
+        remaining = st["deadline"] - time.time()
+    if remaining <= 0:
+        return "late"
 
-    # Only first answer counts
-    if tg_id in st["answers"]:
-        return await msg.answer("You already locked in an answer for this question.")
+    # Make sure the reveal can resolve this player; a cache hit costs no DB round trip.
+    await USER_CACHE.resolve(from_user)
 
-    st["answers"][tg_id] = (choice, time.time())
-    await msg.answer("✅ Answer locked in. Wait for the reveal!")
+    # Only first answer counts
+    ts = time.time()
+    if not await ROUNDS.add_answer(chat_id, from_user.id, choice, ts):
+        return "dupe"
+    if JOURNAL:
+        await JOURNAL.answer(chat_id, from_user.id, choice, ts)  # ack only once it's on disk
+    return "locked"
+
+_TAP_REPLIES = {
+    "locked": "✅ Answer {choice} locked in. Wait for the reveal!",
+    "dupe": "You already locked in an answer for this question.",
+    "late": "Too late—time is up.",
+    "none": "This question is closed.",
+}
+
+async def cb_answer(cq: CallbackQuery):
+    """Keyboard taps: acknowledged with a toast via answer_callback_query, never a chat message."""
+    _, tag, choice = cq.data.split(":", 2)
+    if cq.message is None or choice not in ("A", "B", "C", "D"):
+        return await cq.answer()
+    result = await _record_answer(cq.message.chat.id, cq.from_user, choice, tag)
+    await cq.answer(_TAP_REPLIES[result].format(choice=choice))
 
 async def cmd_leaderboard(msg: Message):
-    with SessionLocal() as s:
-        wk = week_key()
-        rows = s.execute(
-            select(Score, User).join(User, User.id == Score.user_id)
-            .where(Score.week_key == wk)
-            .order_by(desc(Score.points))
-            .limit(15)
-        ).all()
-        if not rows:
-            return await msg.answer("No scores yet this week. /join and /quiz to play!")
-
-        out = [f"<b>Leaderboard {esc(wk)}</b>"]
-        for i, (sc, u) in enumerate(rows, start=1):
-            uname = f"@{u.username}" if u.username else str(u.tg_id)
-            out.append(f"{i}. {esc(uname)}: {sc.points} pts ({sc.correct}✓/{sc.wrong}✗)")
-
-    await msg.answer("\n".join(out), parse_mode="HTML")
+    # /leaderboard [all | month | chat [all|month]]; plain /leaderboard is this week across all chats
+    args = (msg.text or "").lower().split()[1:]
+    if args and args != ["week"]:
+        return await _rollup_leaderboard(msg, args)
+    board = await LEADERBOARDS.get(week_key())
+    text = board.render()
+    if not text:
+        return await msg.answer("No scores yet this week. /join and /quiz to play!")
+    await msg.answer(text, parse_mode="HTML")
+
+async def _rollup_leaderboard(msg: Message, args: list[str]):
+    chat_id = ALL_CHATS
+    if args[0] == "chat":
+        chat_id, args = msg.chat.id, args[1:]
+    span = args[0] if args else ("week" if chat_id != ALL_CHATS else "")
+    periods = {"all": (ALL_TIME, "all time"), "month": (month_key(), "this month"), "week": (week_key(), "this week")}
+    if span not in periods or (span == "week" and chat_id == ALL_CHATS):
+        return await msg.answer("Usage: /leaderboard [week | all | month | chat [all|month]]")
+    period, label = periods[span]
+    async with AsyncSessionLocal() as s:
+        rows = await s.run_sync(rollup_top, period, chat_id)
+    if not rows:
+        return await msg.answer("No scores here yet. /quiz to play!")
+    title = f"Leaderboard {label}" + (" in this chat" if chat_id != ALL_CHATS else "")
+    await msg.answer(render_rows(title, ((display_name(u, tg), p, c, w) for u, tg, p, c, w in rows)), parse_mode="HTML")
 
 async def cmd_myscore(msg: Message):
-    with SessionLocal() as s:
-        user = get_or_create_user(s, msg)
-        sc = s.execute(select(Score).where(Score.user_id==user.id, Score.week_key==week_key())).scalar_one_or_none()
-        if not sc:
-            return await msg.answer("No score yet. Use /join and /quiz to play.")
-        await msg.answer(f"Your score this week: {sc.points} pts • {sc.correct}✓/{sc.wrong}✗ • streak {sc.streak}")
+    user_id = await get_user_id(msg)
+    board = await LEADERBOARDS.get(week_key())
+    row = board.get(user_id)
+    if not row:
+        return await msg.answer("No score yet. Use /join and /quiz to play.")
+    points, correct, wrong, streak = row
+    await msg.answer(
+        f"Your score this week: {points} pts • {correct}✓/{wrong}✗ • streak {streak} • "
+        f"rank #{board.rank(user_id)}/{len(board)}"
+    )
+
+async def cmd_schedule(msg: Message, bot: Bot):
+    # /schedule [<minutes> [questions] | off]; group admins only, like /quiz
+    if msg.chat.type in ("group", "supergroup"):
+        if not await is_admin(bot, msg.chat.id, msg.from_user.id):
+            OUTBOX.send(msg.chat.id, "🚫 Only group admins can schedule rounds.", ack="not_admin")
+            return
+    args = (msg.text or "").lower().split()[1:]
+    usage = (f"Usage: /schedule <minutes> [questions] | off (every {settings.auto_round_min_minutes}+ minutes, "
+             f"1-10 questions)")
+    if not args:
+        cur = AUTOROUNDS.get(msg.chat.id)
+        return await msg.answer(f"Auto-rounds: {cur[1]} question(s) every {cur[0]} min." if cur
+                                else f"No auto-rounds in this chat.\n{usage}")
+    if args[0] == "off":
+        await clear_schedule(msg.chat.id)
+        AUTOROUNDS.apply(msg.chat.id, None)
+        return await msg.answer("Auto-rounds off.")
+    try:
+        every = int(args[0])
+        questions = int(args[1]) if len(args) > 1 else settings.round_len
+    except ValueError:
+        return await msg.answer(usage)
+    # a round has to be over well before the next one is due
+    if every < settings.auto_round_min_minutes or not 1 <= questions <= 10 \
+            or questions * (settings.answer_seconds + 30) > every * 60:
+        return await msg.answer(usage)
+    await save_schedule(msg.chat.id, every, questions, msg.from_user.id)
+    AUTOROUNDS.apply(msg.chat.id, every, questions)
+    await msg.answer(f"Auto-rounds: {questions} question(s) every {every} min, the first within {every} min.")
+
+async def on_my_chat_member(event: ChatMemberUpdated):
+    await ADMINS.on_member_update(event)
+    # removed from the chat: its schedule would only produce failed sends
+    if event.new_chat_member.status in ("left", "kicked") and AUTOROUNDS.get(event.chat.id):
+        await clear_schedule(event.chat.id)
+        AUTOROUNDS.apply(event.chat.id, None)
 
 def _is_admin(user_id: int) -> bool:
     return user_id in settings.admin_ids
@@ -291,7 +419,16 @@ async def cmd_admin(msg: Message):
         return await msg.answer("Usage: /admin <status|endweek|payout|reset>")
     sub = parts[1].lower()
     if sub == "status":
-        await msg.answer(f"OK. week={week_key()} dry_run={settings.payouts_dry_run} admins={settings.admin_ids}")
+        await msg.answer(
+            f"OK. week={week_key()} dry_run={settings.payouts_dry_run} admins={settings.admin_ids}\n"
+            f"user cache: {USER_CACHE.stats()}\n"
+            f"admin cache: {ADMINS.stats()}\n"
+            f"journal: {JOURNAL.stats() if JOURNAL else 'off'}\n"
+            f"outbox: {OUTBOX.stats()}\n"
+            f"rounds: active={len(await ROUNDS.active())} pending_deadlines={DEADLINES.pending()} fired={DEADLINES.fired}\n"
+            f"round gate: {GATE.stats()} scheduled_chats={len(AUTOROUNDS)}\n"
+            f"{METRICS.summary()}"
+        )
     elif sub == "endweek":
         await _admin_endweek(msg)
     elif sub == "payout":
@@ -302,75 +439,131 @@ async def cmd_admin(msg: Message):
         await msg.answer("Unknown admin subcommand.")
 
 async def _admin_endweek(msg: Message):
-    from .scheduler import export_weekly_csv
+    from .scheduler import export_weekly_csv_async
     wk = week_key()
-    with SessionLocal() as s:
-        path = export_weekly_csv(s, wk)
+    path = await export_weekly_csv_async(wk)
     await msg.answer(f"Exported weekly CSV for {wk}: {path}")
 
 async def _admin_payout(msg: Message):
-    # Compute proportional payouts among top N
-    N = settings.winners_count
-    wk = week_key()
-    with SessionLocal() as s:
-        q = s.execute(
-            select(Score, User).join(User, User.id==Score.user_id)
-            .where(Score.week_key==wk).order_by(desc(Score.points)).limit(N)
-        ).all()
-        if not q:
-            return await msg.answer("No scores to pay out.")
-        total_pts = sum(sc.points for sc, _ in q)
-        if total_pts == 0:
-            return await msg.answer("Top players have 0 points; nothing to pay.")
-        # For this template, we won't compute token pool. Adjust as needed.
-        # Example: 1000_000_000 lamports (decimals for your SPL) distributed proportionally.
-        pool = 1_000_000  # placeholder smallest units (change to your SPL decimals)
-        lines = [f"Payouts for {wk} (pool={pool} units, dry_run={settings.payouts_dry_run}):"]
-        pc = PayoutClient(settings.rpc_endpoint, settings.rpc_commitment)
-        for sc, u in q:
-            share = int(pool * (sc.points / total_pts))
-            w = s.execute(select(Wallet).where(Wallet.user_id==u.id)).scalar_one_or_none()
-            addr = w.address if w else None
-            if not addr:
-                lines.append(f"- @{u.username or u.tg_id}: NO WALLET ON FILE -> skipped")
-                continue
-            sig = pc.transfer_spl(
-                mint=settings.strip_mint or "MINT_PLACEHOLDER",
-                treasury_key=settings.treasury_private_key or "KEY_PLACEHOLDER",
-                to_wallet=addr,
-                amount=share,
-                dry_run=settings.payouts_dry_run
-            )
-            lines.append(f"- @{u.username or u.tg_id}: {share} -> {sig}")
-    await msg.answer("\n".join(lines))
+    # Proportional payouts among top N, recorded in `payouts` so a re-run never pays twice
+    from .solana_payouts import PayoutClient  # the Solana stack is only loaded by an admin payout
+    from .payouts import run_payouts
+    lines = await run_payouts(week_key(), PayoutClient(settings.rpc_endpoint, settings.rpc_commitment))
+    # Telegram caps messages at 4096 chars; large WINNERS_COUNT reports get summarised
+    text = "\n".join(lines)
+    if len(text) > 4000:
+        text = "\n".join(lines[:40] + [f"...and {len(lines) - 40} more lines"])
+    await msg.answer(text)
 
 async def _admin_reset(msg: Message):
+    from .scheduler import export_weekly_csv_async
+    from .archive import archive_weeks
     wk = week_key()
-    # In a real reset, you might snapshot then delete; here we soft reset by rolling to new week (no-op).
-    await msg.answer(f"Reset signal acknowledged for {wk}. To truly clear, rotate week or implement archival delete.")
-
-async def main():
-    ensure_db()
-    bot = Bot(settings.bot_token)
+    # snapshot first (under its own name: the week's own export comes later), then move the week's
+    # rows into score_archive and drop its per-chat rollups; play continues on a fresh board
+    path = await export_weekly_csv_async(wk, label="reset-" + datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ"))
+    async with AsyncSessionLocal() as s:
+        moved = await s.run_sync(archive_weeks, [wk], drop_rollups=True)
+    LEADERBOARDS.drop(wk)
+    await msg.answer(f"Reset {wk}: {moved} scores archived (export: {path}).")
+
+def build_dispatcher() -> Dispatcher:
     dp = Dispatcher()
-    # attach admin ids on bot object for scheduler notices
-    setattr(bot, "admin_ids", settings.admin_ids)
-
+    dp.message.outer_middleware(THROTTLE)
+    dp.message.middleware(MetricsMiddleware())
+    dp.callback_query.outer_middleware(THROTTLE)
+    dp.callback_query.middleware(MetricsMiddleware())
     dp.message.register(cmd_start, CommandStart())
     dp.message.register(cmd_help, Command("help"))
     dp.message.register(cmd_rules, Command("rules"))
     dp.message.register(cmd_join, Command("join"))
     dp.message.register(cmd_quiz, Command("quiz"))
     dp.message.register(cmd_answer, Command("answer"))
+    dp.callback_query.register(cb_answer, F.data.startswith("ans:"))
     dp.message.register(cmd_leaderboard, Command("leaderboard"))
     dp.message.register(cmd_myscore, Command("myscore"))
     dp.message.register(cmd_wallet, Command("wallet"))
+    dp.message.register(cmd_schedule, Command("schedule"))
     dp.message.register(cmd_admin, Command("admin"))
+    dp.chat_member.register(ADMINS.on_member_update)
+    dp.my_chat_member.register(on_my_chat_member)
+    return dp
+
+async def on_startup(bot: Bot, run_scheduler: bool = True, metrics_port: int | None = None) -> list[asyncio.Task]:
+    """Start background services; returns the tasks to hand to on_shutdown.
+
+    Only what an incoming answer depends on is done before returning; caches
+    and the scheduler warm up in a task while polling already runs.
+    """
+    # ~200k objects from imports (mostly aiogram's models) live forever; without this every
+    # full collection walks them all, a ~100ms stall that first lands on the first updates
+    gc.freeze()
+    # attach admin ids on bot object for scheduler notices
+    setattr(bot, "admin_ids", settings.admin_ids)
+    # questions journaled but never settled by a previous run are put back, then revealed below
+    if JOURNAL:
+        for chat_id, st in JOURNAL.replay().items():
+            await ROUNDS.start_question(chat_id, st["correct"], st["deadline"], st["tag"])
+            for tg_id, (choice, ts) in st["answers"].items():
+                await ROUNDS.add_answer(chat_id, tg_id, choice, ts)
+        JOURNAL.start()
+    # questions left open by a previous run (shared round store) still get revealed, by the chat's worker
+    for chat_id, deadline in await ROUNDS.active():
+        if AUTOROUNDS.owns(chat_id):
+            DEADLINES.schedule(chat_id, max(0.0, deadline - time.time()))
+    OUTBOX.start(bot)
+    tasks = [
+        asyncio.create_task(USER_CACHE.run_flusher(settings.user_flush_seconds)),
+        asyncio.create_task(_warm_up(bot, run_scheduler)),
+    ]
+    port = settings.metrics_port if metrics_port is None else metrics_port
+    if port:
+        tasks.append(asyncio.create_task(metrics.serve(port, settings.metrics_host)))
+    return tasks
+
+async def _warm_up(bot: Bot, run_scheduler: bool):
+    """The background half of startup: each step runs on its own, and a failure is logged, not lost."""
+    async def scheduler():
+        from .scheduler import schedule_jobs  # APScheduler loads off the startup path
+        # the weekly job runs on one worker when sharded; each worker runs its own chats' auto-rounds
+        await AUTOROUNDS.start(schedule_jobs(bot, weekly=run_scheduler))
+
+    async def question_bank():
+        BANK.start()
+
+    async def leaderboard():
+        # a /leaderboard before this finishes just loads the board itself
+        await LEADERBOARDS.get(week_key())
+
+    for step in (scheduler, question_bank, leaderboard):
+        try:
+            await step()
+        except Exception:
+            log.exception("startup step %s failed", step.__name__)
+
+async def on_shutdown(tasks: list[asyncio.Task]):
+    for t in tasks:
+        t.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    AUTOROUNDS.close()
+    await USER_CACHE.flush()
+    await BANK.close()
+    await OUTBOX.close()
+    await DEADLINES.close()
+    if JOURNAL:
+        await JOURNAL.close()
+    await ROUNDS.close()
+    await async_engine.dispose()
 
-    # fire up weekly scheduler
-    schedule_jobs(bot)
-
-    await dp.start_polling(bot)
+async def main():
+    ensure_db()
+    bot = Bot(settings.bot_token)
+    dp = build_dispatcher()
+    tasks = await on_startup(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await on_shutdown(tasks)
 
 if __name__ == "__main__":
     asyncio.run(main())
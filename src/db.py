@@ -1,9 +1,13 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-import os
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+import ast, logging, os, re
 
 from .utils.config import settings
 
+log = logging.getLogger(__name__)
+
 class Base(DeclarativeBase):
     pass
 
@@ -13,5 +17,104 @@ def _db_url():
     db_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "trivia.sqlite3")
     return f"sqlite:///{db_path}"
 
+def _async_db_url():
+    # Same database as the sync engine, but through an asyncio driver:
+    # aiosqlite for SQLite, asyncpg for Postgres (psycopg 3 is async-capable as-is).
+    url = _db_url()
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("sqlite", "sqlite+pysqlite"):
+        return f"sqlite+aiosqlite{sep}{rest}"
+    if scheme in ("postgres", "postgresql", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+def dialect_insert(bind):
+    """``insert`` construct with ON CONFLICT support for the bound dialect."""
+    name = bind.dialect.name
+    if name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        raise RuntimeError(f"upserts not supported on {name}")
+    return insert
+
 engine = create_engine(_db_url(), echo=False, future=True)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True, expire_on_commit=False)
+
+# Used by the bot handlers so a slow query never stalls polling for other chats.
+async_engine = create_async_engine(
+    _async_db_url(),
+    echo=False,
+    # aiosqlite would default to NullPool (a fresh connection per session); pool it like Postgres.
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.db_pool_size,
+    max_overflow=settings.db_max_overflow,
+)
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+if async_engine.dialect.name == "sqlite":
+    # WAL lets readers proceed while a reveal is writing; busy_timeout queues writers instead of failing.
+    @event.listens_for(async_engine.sync_engine, "connect")
+    def _sqlite_pragmas(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA busy_timeout=5000")
+        cur.close()
+
+_MIGRATIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "migrations")
+_REVISION_LINE = re.compile(r"^(revision|down_revision)\s*=\s*(.+)$", re.M)
+
+def _migrations() -> tuple[set[str], set[str]]:
+    """(head revisions, all revisions) of migrations/versions.
+
+    Read straight from the files: loading alembic's script directory just to
+    compare one string costs more than the rest of startup's DB work.
+    """
+    revs, parents = set(), set()
+    versions = os.path.join(_MIGRATIONS, "versions")
+    for name in os.listdir(versions):
+        if not name.endswith(".py"):
+            continue
+        with open(os.path.join(versions, name), encoding="utf-8") as f:
+            found = dict(_REVISION_LINE.findall(f.read()))
+        revs.add(ast.literal_eval(found["revision"]))
+        down = ast.literal_eval(found["down_revision"])
+        parents.update(down if isinstance(down, tuple) else (down,))
+    return revs - parents, revs
+
+def _upgrade(to: str = "head", stamp: str | None = None):
+    from alembic import command
+    from alembic.config import Config
+    cfg = Config()  # no ini: keep the app's logging config
+    cfg.set_main_option("script_location", _MIGRATIONS)
+    if stamp:
+        command.stamp(cfg, stamp)
+    command.upgrade(cfg, to)
+
+def ensure_schema(auto_migrate: bool = True):
+    """Check the database is at the migration heads; upgrade it if allowed.
+
+    Costs one query when the schema is current. A fresh database is always
+    migrated; one created by ``create_all`` before migrations existed is
+    stamped at the baseline first.
+    """
+    heads, known = _migrations()
+    with engine.connect() as conn:
+        insp = inspect(conn)
+        current = None
+        if insp.has_table("alembic_version"):
+            current = set(conn.scalars(text("SELECT version_num FROM alembic_version")))
+        legacy = current is None and insp.has_table("users")
+    if current == heads:
+        return
+    if current and not current <= known:
+        raise SystemExit(f"database schema {sorted(current)} is newer than this code ({sorted(heads)})")
+    if current is None and not legacy:
+        log.info("empty database: creating schema at %s", sorted(heads))
+        return _upgrade()
+    if not auto_migrate:
+        have = "unversioned (run `alembic stamp 0001` first)" if legacy else sorted(current)
+        raise SystemExit(f"database schema is {have}, code expects {sorted(heads)}: run `alembic upgrade head`")
+    log.warning("migrating database schema %s -> %s", "unversioned" if legacy else sorted(current), sorted(heads))
+    _upgrade(stamp="0001" if legacy else None)
@@ -0,0 +1,131 @@
+import asyncio
+from collections import OrderedDict
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+from .db import AsyncSessionLocal
+from .models import User
+
+# Profile fields we mirror from Telegram's from_user onto the users row.
+_FIELDS = ("username", "first_name", "last_name")
+
+def _profile(from_user) -> tuple:
+    return tuple(getattr(from_user, f) for f in _FIELDS)
+
+class UserCache:
+    """Bounded LRU of tg_id -> (user id, profile) with write-behind profile updates.
+
+    A hit never touches the database: if the sender's username/name changed we
+    only mark the entry dirty, and ``flush()`` writes all pending changes in one
+    batched UPDATE.
+    """
+
+    def __init__(self, maxsize: int = 50_000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[int, tuple[int, tuple]] = OrderedDict()
+        self._dirty: dict[int, tuple] = {}  # user id -> profile to write
+        self._loading: dict[int, asyncio.Future] = {}  # tg_id -> in-flight miss
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, tg_id: int):
+        e = self._entries.get(tg_id)
+        if e is None:
+            return None
+        self._entries.move_to_end(tg_id)
+        return e
+
+    def put(self, tg_id: int, user_id: int, profile: tuple):
+        self._entries[tg_id] = (user_id, profile)
+        self._entries.move_to_end(tg_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def observe(self, from_user):
+        """Return the cached user id for ``from_user`` (None on miss), noting profile changes."""
+        e = self.get(from_user.id)
+        if e is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        user_id, cached = e
+        profile = _profile(from_user)
+        if profile != cached:
+            self._entries[from_user.id] = (user_id, profile)
+            self._dirty[user_id] = profile
+        return user_id
+
+    async def resolve(self, from_user) -> int:
+        """User id for ``from_user``; loads or creates the row only on a cache miss."""
+        user_id = self.observe(from_user)
+        if user_id is not None:
+            return user_id
+        # one load per tg_id: the same player answering in several chats at once
+        # would otherwise race to insert the same row
+        pending = self._loading.get(from_user.id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+        fut = self._loading[from_user.id] = asyncio.get_running_loop().create_future()
+        try:
+            profile = _profile(from_user)
+            try:
+                user_id = await self._load(from_user.id, profile)
+            except IntegrityError:  # another worker inserted it first
+                user_id = await self._load(from_user.id, profile)
+            self.put(from_user.id, user_id, profile)
+            fut.set_result(user_id)
+            return user_id
+        except Exception as e:
+            fut.set_exception(e)
+            fut.exception()  # waiters re-raise it; don't warn if there were none
+            raise
+        finally:
+            if not fut.done():  # cancelled mid-load
+                fut.cancel()
+            del self._loading[from_user.id]
+
+    async def _load(self, tg_id: int, profile: tuple) -> int:
+        async with AsyncSessionLocal() as s:
+            u = (await s.execute(select(User).where(User.tg_id == tg_id))).scalar_one_or_none()
+            if u is None:
+                u = User(tg_id=tg_id, **dict(zip(_FIELDS, profile)))
+                s.add(u)
+                await s.commit()
+            elif _profile(u) != profile:
+                for f, v in zip(_FIELDS, profile):
+                    setattr(u, f, v)
+                await s.commit()
+            return u.id
+
+    async def flush(self) -> int:
+        """Write pending profile changes in one transaction; returns rows written."""
+        if not self._dirty:
+            return 0
+        pending, self._dirty = self._dirty, {}
+        rows = [{"id": uid, **dict(zip(_FIELDS, p))} for uid, p in pending.items()]
+        try:
+            async with AsyncSessionLocal() as s:
+                await s.execute(update(User), rows)
+                await s.commit()
+        except Exception:
+            # keep them for the next pass, unless a newer change already superseded them
+            for uid, p in pending.items():
+                self._dirty.setdefault(uid, p)
+            raise
+        return len(rows)
+
+    async def run_flusher(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                pass
+
+    def stats(self) -> str:
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"size={len(self)}/{self.maxsize} hits={self.hits} misses={self.misses} ({rate:.1f}%) dirty={len(self._dirty)}"
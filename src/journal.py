@@ -0,0 +1,158 @@
+"""Append-only journal of open questions and their answers, so a crash mid-round loses nothing.
+
+One orjson array per line:
+
+    ["q", chat_id, correct, deadline, tag] question opened (discards the chat's previous one)
+    ["a", chat_id, tg_id, choice, ts]      first answer from a player
+    ["s", chat_id]                         question revealed and its scores committed
+
+Times are epoch seconds, like the round store, so they survive a restart.
+Records are written by one task in batches with a single fsync per batch
+(group commit); ``answer()`` resolves once its batch is on disk. On startup
+``replay()`` returns every question that was never settled. When the file
+passes ``compact_bytes``, and on every start and clean shutdown, it is
+rewritten with only the unsettled records.
+"""
+import asyncio, logging, os
+import orjson
+
+log = logging.getLogger(__name__)
+
+class AnswerJournal:
+    def __init__(self, path: str, compact_bytes: int = 8 << 20):
+        self.path = path
+        self.compact_bytes = compact_bytes
+        self._f = None
+        self._size = 0
+        self._pending: list[tuple[int, str, bytes]] = []  # (chat_id, kind, line) not yet written
+        self._waiters: list[asyncio.Future] = []
+        self._open: dict[int, list[bytes]] = {}  # chat_id -> written lines of its unsettled question
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.batches = self.records = self.compactions = self.errors = 0
+
+    def replay(self) -> dict[int, dict]:
+        """Unsettled questions in the journal: ``{chat_id: {"correct", "deadline", "tag", "answers"}}``."""
+        rounds: dict[int, dict] = {}
+        self._open = {}
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return rounds
+        with f:
+            for line in f:
+                try:
+                    rec = orjson.loads(line)
+                except orjson.JSONDecodeError:
+                    continue  # torn last write
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                kind, chat_id = rec[0], rec[1]
+                if kind == "q":
+                    rounds[chat_id] = {"correct": rec[2], "deadline": rec[3],
+                                       "tag": rec[4] if len(rec) > 4 else None, "answers": {}}
+                    self._open[chat_id] = [line]
+                elif kind == "a" and chat_id in rounds:
+                    rounds[chat_id]["answers"].setdefault(rec[2], (rec[3], rec[4]))
+                    self._open[chat_id].append(line)
+                elif kind == "s":
+                    rounds.pop(chat_id, None)
+                    self._open.pop(chat_id, None)
+        return rounds
+
+    def start(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        # start from just the unsettled records; this is also where a restart rotates the file
+        self._compact(b"".join(line for lines in self._open.values() for line in lines))
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def _append(self, chat_id: int, kind: str, rec: list):
+        if self._task is None:  # not started (or closed): nothing to make durable
+            return
+        self._pending.append((chat_id, kind, orjson.dumps(rec) + b"\n"))
+        self._wake.set()
+
+    def question(self, chat_id: int, correct: str, deadline: float, tag: str):
+        self._append(chat_id, "q", ["q", chat_id, correct, deadline, tag])
+
+    async def answer(self, chat_id: int, tg_id: int, choice: str, ts: float):
+        """Journal a first answer and wait until it is on disk."""
+        if self._task is None:
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._append(chat_id, "a", ["a", chat_id, tg_id, choice, ts])
+        await fut
+
+    def settled(self, chat_id: int):
+        self._append(chat_id, "s", ["s", chat_id])
+
+    async def _run(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            await self._flush()
+
+    async def _flush(self):
+        batch, self._pending = self._pending, []
+        waiters, self._waiters = self._waiters, []
+        if batch:
+            try:
+                await asyncio.to_thread(self._write, b"".join(line for _, _, line in batch))
+                self.batches += 1
+                self.records += len(batch)
+            except Exception:
+                # the answers are still in the round store; only crash safety is lost for them
+                self.errors += 1
+                log.exception("answer journal write failed")
+            for chat_id, kind, line in batch:
+                if kind == "q":
+                    self._open[chat_id] = [line]
+                elif kind == "a" and chat_id in self._open:
+                    self._open[chat_id].append(line)
+                elif kind == "s":
+                    self._open.pop(chat_id, None)
+        for w in waiters:
+            if not w.done():
+                w.set_result(None)
+        if self._size > self.compact_bytes:
+            live = b"".join(line for lines in self._open.values() for line in lines)
+            try:
+                await asyncio.to_thread(self._compact, live)
+                self.compactions += 1
+            except Exception:
+                log.exception("answer journal compaction failed")
+
+    def _write(self, data: bytes):
+        self._f.write(data)
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._size += len(data)
+
+    def _compact(self, live: bytes):
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(live)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        if self._f:
+            self._f.close()
+        self._f = open(self.path, "ab")
+        self._size = len(live)
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._f:
+            await self._flush()
+            self._compact(b"".join(line for lines in self._open.values() for line in lines))
+            self._f.close()
+            self._f = None
+
+    def stats(self) -> str:
+        return (f"open={len(self._open)} size={self._size} records={self.records} batches={self.batches} "
+                f"compactions={self.compactions} errors={self.errors}")
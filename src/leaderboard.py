@@ -0,0 +1,119 @@
+import asyncio, html, time
+from bisect import bisect_left, insort
+from sqlalchemy import select
+
+from .db import AsyncSessionLocal
+from .models import Score, User
+
+TOP_N = 15
+
+def display_name(username: str | None, tg_id: int) -> str:
+    return f"@{username}" if username else str(tg_id)
+
+def render_rows(title: str, rows) -> str:
+    """HTML standings from ``(name, points, correct, wrong)`` rows, best first."""
+    out = [f"<b>{html.escape(title)}</b>"]
+    for i, (name, points, correct, wrong) in enumerate(rows, start=1):
+        out.append(f"{i}. {html.escape(name)}: {points} pts ({correct}✓/{wrong}✗)")
+    return "\n".join(out)
+
+class WeeklyBoard:
+    """Sorted in-memory standings for one ``week_key``.
+
+    Entries are ordered by ``(-points, user_id)`` in a plain list, so top-K is
+    a slice and a user's rank is one bisect. The rendered /leaderboard HTML is
+    cached and rebuilt only after a score actually changes.
+    """
+
+    def __init__(self, week_key: str):
+        self.week_key = week_key
+        self._order: list[tuple[int, int]] = []  # (-points, user_id)
+        self._rows: dict[int, tuple[int, int, int, int]] = {}  # user_id -> (points, correct, wrong, streak)
+        self._names: dict[int, str] = {}
+        self._html: str | None = None
+
+    def __len__(self):
+        return len(self._order)
+
+    def update(self, user_id: int, points: int, correct: int, wrong: int, streak: int, name: str | None = None):
+        old = self._rows.get(user_id)
+        if name is not None and self._names.get(user_id) != name:
+            self._names[user_id] = name
+            self._html = None
+        if old == (points, correct, wrong, streak):
+            return
+        if old is not None and old[0] != points:
+            del self._order[bisect_left(self._order, (-old[0], user_id))]
+        if old is None or old[0] != points:
+            insort(self._order, (-points, user_id))
+        self._rows[user_id] = (points, correct, wrong, streak)
+        self._html = None
+
+    def get(self, user_id: int):
+        return self._rows.get(user_id)
+
+    def rank(self, user_id: int) -> int | None:
+        row = self._rows.get(user_id)
+        if row is None:
+            return None
+        return bisect_left(self._order, (-row[0], user_id)) + 1
+
+    def top(self, k: int = TOP_N) -> list[tuple[int, str, tuple[int, int, int, int]]]:
+        return [(uid, self._names.get(uid, str(uid)), self._rows[uid]) for _, uid in self._order[:k]]
+
+    def render(self) -> str | None:
+        if not self._order:
+            return None
+        if self._html is None:
+            self._html = render_rows(f"Leaderboard {self.week_key}",
+                                     ((name, p, c, w) for _, name, (p, c, w, _s) in self.top()))
+        return self._html
+
+class Leaderboards:
+    """Boards per week, seeded from ``scores`` on first use and then kept current by the reveal.
+
+    With several worker processes each only sees its own reveals, so
+    ``max_age`` > 0 makes a board reload from ``scores`` once it is that old.
+    """
+
+    def __init__(self, keep_weeks: int = 2, max_age: float = 0):
+        self.keep_weeks = keep_weeks
+        self.max_age = max_age
+        self._boards: dict[str, WeeklyBoard] = {}
+        self._loaded: dict[str, float] = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, week_key: str) -> WeeklyBoard:
+        board = self._boards.get(week_key)
+        if board is not None and not self._stale(week_key):
+            return board
+        async with self._lock:  # one seeding query per week, however many handlers ask at once
+            board = self._boards.get(week_key)
+            if board is None or self._stale(week_key):
+                board = await self._load(week_key)
+                self._boards[week_key] = board
+                self._loaded[week_key] = time.monotonic()
+                for old in sorted(self._boards)[:-self.keep_weeks]:
+                    del self._boards[old]
+                    self._loaded.pop(old, None)
+        return board
+
+    def drop(self, week_key: str):
+        """Forget a week's board (its scores were reset); the next ``get`` reloads it."""
+        self._boards.pop(week_key, None)
+        self._loaded.pop(week_key, None)
+
+    def _stale(self, week_key: str) -> bool:
+        return self.max_age > 0 and time.monotonic() - self._loaded.get(week_key, 0) > self.max_age
+
+    async def _load(self, week_key: str) -> WeeklyBoard:
+        board = WeeklyBoard(week_key)
+        async with AsyncSessionLocal() as s:
+            rows = await s.execute(
+                select(Score.user_id, Score.points, Score.correct, Score.wrong, Score.streak, User.username, User.tg_id)
+                .join(User, User.id == Score.user_id)
+                .where(Score.week_key == week_key)
+            )
+            for uid, points, correct, wrong, streak, username, tg_id in rows:
+                board.update(uid, points, correct, wrong, streak, display_name(username, tg_id))
+        return board
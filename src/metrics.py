@@ -0,0 +1,190 @@
+"""In-process metrics: handler latency, DB work per update, and live gauges.
+
+Served in the Prometheus text format on ``METRICS_PORT`` (``/metrics``) and
+summarised by ``/admin status``. The handful of series we keep doesn't need
+a client library.
+"""
+import asyncio, bisect, time
+from contextvars import ContextVar
+from typing import Callable
+from aiohttp import web
+from aiogram import BaseMiddleware
+from sqlalchemy import event
+
+_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(_BUCKETS) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, v: float):
+        self.counts[bisect.bisect_left(_BUCKETS, v)] += 1
+        self.sum += v
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """Estimate like Prometheus' histogram_quantile: interpolate inside the bucket."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for i, c in enumerate(self.counts):
+            if c and seen + c >= rank:
+                if i == len(_BUCKETS):
+                    return _BUCKETS[-1]
+                lo = _BUCKETS[i - 1] if i else 0.0
+                return lo + (_BUCKETS[i] - lo) * (rank - seen) / c
+            seen += c
+        return _BUCKETS[-1]
+
+class DbStats:
+    __slots__ = ("queries", "commits", "seconds")
+
+    def __init__(self):
+        self.queries = self.commits = 0
+        self.seconds = 0.0
+
+class HandlerStats:
+    __slots__ = ("latency", "errors", "db")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.db = DbStats()
+
+# DB work done while handling the current update (None outside handlers)
+_update_db: ContextVar[DbStats | None] = ContextVar("update_db", default=None)
+
+class Metrics:
+    def __init__(self):
+        self.handlers: dict[str, HandlerStats] = {}
+        self.db = DbStats()
+        self._gauges: dict[str, tuple[str, Callable[[], float], str]] = {}
+
+    def handler(self, name: str) -> HandlerStats:
+        h = self.handlers.get(name)
+        if h is None:
+            h = self.handlers[name] = HandlerStats()
+        return h
+
+    def gauge(self, name: str, help: str, fn: Callable[[], float], kind: str = "gauge"):
+        """Report ``fn()`` at scrape time (kind="counter" for running totals kept elsewhere)."""
+        self._gauges[name] = (help, fn, kind)
+
+    def instrument(self, *engines):
+        """Count queries, commits and time in the database on these (sync) engines."""
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", _before_execute)
+            event.listen(engine, "after_cursor_execute", self._after_execute)
+            event.listen(engine, "commit", self._on_commit)
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("metrics_t0", time.perf_counter())
+        for s in (self.db, _update_db.get()):
+            if s is not None:
+                s.queries += 1
+                s.seconds += elapsed
+
+    def _on_commit(self, conn):
+        for s in (self.db, _update_db.get()):
+            if s is not None:
+                s.commits += 1
+
+    def render(self) -> str:
+        out = [
+            "# HELP trivia_handler_seconds Time spent in each update handler.",
+            "# TYPE trivia_handler_seconds histogram",
+        ]
+        for name, h in sorted(self.handlers.items()):
+            acc = 0
+            for le, c in zip(_BUCKETS, h.latency.counts):
+                acc += c
+                out.append(f'trivia_handler_seconds_bucket{{handler="{name}",le="{le}"}} {acc}')
+            out.append(f'trivia_handler_seconds_bucket{{handler="{name}",le="+Inf"}} {h.latency.count}')
+            out.append(f'trivia_handler_seconds_sum{{handler="{name}"}} {h.latency.sum:.6f}')
+            out.append(f'trivia_handler_seconds_count{{handler="{name}"}} {h.latency.count}')
+        for metric, help, kind, attr in (
+            ("trivia_handler_errors_total", "Handler calls that raised.", "counter", None),
+            ("trivia_handler_db_queries_total", "Queries issued while handling updates.", "counter", "queries"),
+            ("trivia_handler_db_commits_total", "Commits issued while handling updates.", "counter", "commits"),
+            ("trivia_handler_db_seconds_total", "Time in the database while handling updates.", "counter", "seconds"),
+        ):
+            out += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}"]
+            for name, h in sorted(self.handlers.items()):
+                v = h.errors if attr is None else getattr(h.db, attr)
+                out.append(f'{metric}{{handler="{name}"}} {v}')
+        for metric, help, v in (
+            ("trivia_db_queries_total", "All queries, including background jobs.", self.db.queries),
+            ("trivia_db_commits_total", "All commits, including background jobs.", self.db.commits),
+            ("trivia_db_seconds_total", "All time in the database.", self.db.seconds),
+        ):
+            out += [f"# HELP {metric} {help}", f"# TYPE {metric} counter", f"{metric} {v}"]
+        for metric, (help, fn, kind) in self._gauges.items():
+            out += [f"# HELP {metric} {help}", f"# TYPE {metric} {kind}", f"{metric} {fn()}"]
+        return "\n".join(out) + "\n"
+
+    def summary(self) -> str:
+        """A few lines for /admin status."""
+        lines = []
+        for name, h in sorted(self.handlers.items(), key=lambda kv: -kv[1].latency.sum):
+            n = h.latency.count or 1
+            lines.append(
+                f"{name}: n={h.latency.count} p50={h.latency.quantile(.5) * 1000:.0f}ms "
+                f"p95={h.latency.quantile(.95) * 1000:.0f}ms err={h.errors} "
+                f"db={h.db.queries / n:.1f}q/{h.db.seconds / n * 1000:.1f}ms per call"
+            )
+        lines.append(f"db: queries={self.db.queries} commits={self.db.commits} time={self.db.seconds:.1f}s")
+        lines.append(" ".join(f"{m.removeprefix('trivia_')}={fn()}" for m, (_, fn, _) in self._gauges.items()))
+        return "\n".join(lines)
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["metrics_t0"] = time.perf_counter()
+
+METRICS = Metrics()
+
+class MetricsMiddleware(BaseMiddleware):
+    """Times each handler call and attributes the DB work it does to it.
+
+    Register as an inner middleware so only matched handlers are measured.
+    /quiz holds its handler for the whole round, so its latency is the round length.
+    """
+
+    def __init__(self, metrics: Metrics = METRICS):
+        self.metrics = metrics
+
+    async def __call__(self, handler, event, data):
+        callback = data.get("handler")
+        h = self.metrics.handler(getattr(callback.callback, "__name__", "unknown") if callback else "unknown")
+        db = DbStats()
+        token = _update_db.set(db)
+        t0 = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            h.errors += 1
+            raise
+        finally:
+            h.latency.observe(time.perf_counter() - t0)
+            _update_db.reset(token)
+            h.db.queries += db.queries
+            h.db.commits += db.commits
+            h.db.seconds += db.seconds
+
+async def serve(port: int, host: str = "0.0.0.0", metrics: Metrics = METRICS):
+    """Serve ``/metrics`` until cancelled."""
+    async def handle(_request):
+        return web.Response(text=metrics.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -1,5 +1,5 @@
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, Boolean, ForeignKey, DateTime, UniqueConstraint, BigInteger
+from sqlalchemy import String, Integer, Boolean, ForeignKey, DateTime, UniqueConstraint, BigInteger, Index, LargeBinary
 from datetime import datetime
 from .db import Base
 
@@ -24,8 +24,9 @@ class Wallet(Base):
 class Score(Base):
     __tablename__ = "scores"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
-    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
-    week_key: Mapped[str] = mapped_column(String(10), index=True)  # e.g. '2025-W35'
+    # uq_user_week leads with user_id and ix_scores_week_points with week_key, so neither needs its own index
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    week_key: Mapped[str] = mapped_column(String(10))  # e.g. '2025-W35'
     points: Mapped[int] = mapped_column(Integer, default=0)
     correct: Mapped[int] = mapped_column(Integer, default=0)
     wrong: Mapped[int] = mapped_column(Integer, default=0)
@@ -33,6 +34,38 @@ class Score(Base):
     updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     __table_args__ = (UniqueConstraint("user_id", "week_key", name="uq_user_week"),)
 
+# A week's standings straight off the index, no sort (index-only on Postgres)
+Index("ix_scores_week_points", Score.week_key, Score.points.desc(), Score.user_id,
+      postgresql_include=["correct", "wrong", "streak"])
+
+class ScoreArchive(Base):
+    """Final standings of closed weeks, moved out of ``scores`` by ``src.archive``."""
+    __tablename__ = "score_archive"
+    week_key: Mapped[str] = mapped_column(String(10), primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    points: Mapped[int] = mapped_column(Integer)
+    correct: Mapped[int] = mapped_column(Integer)
+    wrong: Mapped[int] = mapped_column(Integer)
+    __table_args__ = {"sqlite_with_rowid": False}
+
+class StatRollup(Base):
+    """Running totals per (period, chat, user), bumped by every reveal.
+
+    ``period`` is a week key ("2025-W35"), a month ("2025-08") or "all";
+    ``chat_id`` 0 means every chat.
+    """
+    __tablename__ = "stat_rollups"
+    period: Mapped[str] = mapped_column(String(10), primary_key=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    points: Mapped[int] = mapped_column(Integer, default=0)
+    correct: Mapped[int] = mapped_column(Integer, default=0)
+    wrong: Mapped[int] = mapped_column(Integer, default=0)
+    __table_args__ = {"sqlite_with_rowid": False}
+
+Index("ix_rollups_top", StatRollup.period, StatRollup.chat_id, StatRollup.points.desc(), StatRollup.user_id,
+      StatRollup.correct, StatRollup.wrong)
+
 class Question(Base):
     __tablename__ = "questions"
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -43,6 +76,38 @@ class Question(Base):
     opt_c: Mapped[str] = mapped_column(String(256))
     opt_d: Mapped[str] = mapped_column(String(256))
     correct_opt: Mapped[str] = mapped_column(String(1))  # 'A' | 'B' | 'C' | 'D'
+    content_hash: Mapped[str] = mapped_column(String(64))  # sha256 of prompt + options
+    # (category, id) serves both category filters and the id-seek random sampler
+    __table_args__ = (UniqueConstraint("content_hash", name="uq_questions_content_hash"),
+                      Index("ix_questions_category_id", "category", "id"))
+
+class ChatSeen(Base):
+    """Questions already asked in a chat this week, as a bitset indexed by question id."""
+    __tablename__ = "chat_seen"
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger)
+    week_key: Mapped[str] = mapped_column(String(10))
+    bits: Mapped[bytes] = mapped_column(LargeBinary, default=b"")  # little-endian; bit i = question id i
+    __table_args__ = (UniqueConstraint("chat_id", "week_key", name="uq_chat_week"),)
+
+class ChatSettled(Base):
+    """Deadline (ms) of the newest question per chat whose scores are committed.
+
+    Written in the scoring transaction, so a question replayed from the
+    answer journal after a crash is never scored twice.
+    """
+    __tablename__ = "chat_settled"
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    deadline_ms: Mapped[int] = mapped_column(BigInteger)
+
+class RoundSchedule(Base):
+    """A chat's recurring auto-round, set with /schedule and run by ``src.autorounds``."""
+    __tablename__ = "round_schedules"
+    chat_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=False)
+    every_minutes: Mapped[int] = mapped_column(Integer)
+    questions: Mapped[int] = mapped_column(Integer)
+    set_by: Mapped[int] = mapped_column(BigInteger)  # tg id of the admin who set it
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
 
 class Payout(Base):
     __tablename__ = "payouts"
@@ -52,4 +117,8 @@ class Payout(Base):
     address: Mapped[str] = mapped_column(String(64))
     amount: Mapped[int] = mapped_column(BigInteger)  # token smallest units (e.g. 9 decimals)
     tx_sig: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    # pending -> submitting -> sent | failed (not broadcast, retried) | unknown (check by hand);
+    # dry_run rows may be re-submitted for real later
+    status: Mapped[str] = mapped_column(String(16), default="pending")
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    __table_args__ = (UniqueConstraint("week_key", "user_id", name="uq_payout_week_user"),)
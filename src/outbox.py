@@ -0,0 +1,192 @@
+import asyncio, logging, time
+from collections import deque
+from aiogram.exceptions import TelegramRetryAfter, TelegramNetworkError, TelegramServerError
+
+from .utils.config import settings
+
+log = logging.getLogger(__name__)
+
+_MAX_ATTEMPTS = 3
+
+class _Bucket:
+    """Token bucket on the monotonic clock."""
+
+    __slots__ = ("rate", "burst", "tokens", "stamp", "blocked_until")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate, self.burst = rate, burst
+        self.tokens, self.stamp = burst, time.monotonic()
+        self.blocked_until = 0.0
+
+    def delay(self, now: float) -> float:
+        """Seconds until a token is available (0 if one is available now)."""
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        wait = 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+        return max(wait, self.blocked_until - now)
+
+    def take(self):
+        self.tokens -= 1
+
+class Outbox:
+    """Single outbound queue for chat messages, paced to Telegram's limits.
+
+    Messages are queued per chat and drained round-robin under a global
+    token bucket plus a per-chat bucket (private chats ~1/s, groups
+    ~20/min). At most one message per chat is in flight, so order is kept.
+    A 429 puts the message back at the head of its chat queue and blocks
+    that chat for ``retry_after`` seconds. Low-value acks collapse into one
+    pending message per chat and are dropped once a chat's backlog reaches
+    ``ack_saturation``.
+    """
+
+    def __init__(self, global_per_sec: float | None = None, private_per_sec: float | None = None,
+                 group_per_min: float | None = None, ack_saturation: int | None = None, concurrency: int = 8):
+        self.global_per_sec = global_per_sec or settings.outbox_global_per_sec
+        self.private_per_sec = private_per_sec or settings.outbox_private_per_sec
+        self.group_per_min = group_per_min or settings.outbox_group_per_min
+        self.ack_saturation = ack_saturation or settings.outbox_ack_saturation
+        self.bot = None
+        self._global = _Bucket(self.global_per_sec, self.global_per_sec)
+        self._chats: dict[int, _Bucket] = {}
+        self._queues: dict[int, deque] = {}
+        self._ready: deque[int] = deque()  # chats with queued items, not in flight
+        self._in_flight: set[int] = set()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.sent = self.dropped = self.coalesced = self.retried = 0
+
+    def set_global_rate(self, per_sec: float):
+        """Retune the global bucket, e.g. to one worker's share of the bot-wide limit."""
+        self.global_per_sec = per_sec
+        self._global = _Bucket(per_sec, per_sec)
+
+    def depth(self) -> int:
+        return sum(len(q) for q in self._queues.values())
+
+    def _bucket(self, chat_id: int) -> _Bucket:
+        b = self._chats.get(chat_id)
+        if b is None:
+            if chat_id < 0:  # groups/channels have negative ids
+                b = _Bucket(self.group_per_min / 60.0, 3)
+            else:
+                b = _Bucket(self.private_per_sec, 1)
+            self._chats[chat_id] = b
+        return b
+
+    def send(self, chat_id: int, text: str, *, ack: str | None = None, ack_many: str | None = None, **kwargs) -> asyncio.Future | None:
+        """Queue a message; returns a future resolved with the sent Message, or None if dropped/coalesced.
+
+        ``ack`` names a kind of low-value acknowledgement. While one of the same
+        kind is still queued for the chat, further ones only bump its count,
+        and it goes out as ``ack_many.format(n=count)`` if given.
+        """
+        q = self._queues.setdefault(chat_id, deque())
+        if ack:
+            for item in q:
+                if item["ack"] == ack:
+                    item["count"] += 1
+                    self.coalesced += 1
+                    return None
+            if len(q) >= self.ack_saturation:
+                self.dropped += 1
+                return None
+        fut = asyncio.get_running_loop().create_future()
+        q.append({"text": text, "kwargs": kwargs, "ack": ack, "ack_many": ack_many,
+                  "count": 1, "attempts": 0, "future": fut})
+        if len(q) == 1 and chat_id not in self._in_flight:
+            self._ready.append(chat_id)
+            self._wake.set()
+        return fut
+
+    def start(self, bot):
+        self.bot = bot
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            if not self._ready:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            now = time.monotonic()
+            wait = self._global.delay(now)
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            # first ready chat whose own bucket allows a send; otherwise sleep until the soonest one does
+            soonest = None
+            for _ in range(len(self._ready)):
+                chat_id = self._ready.popleft()
+                d = self._bucket(chat_id).delay(now)
+                if d <= 0:
+                    break
+                self._ready.append(chat_id)
+                soonest = d if soonest is None else min(soonest, d)
+            else:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=soonest)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._slots.acquire()
+            self._global.take()
+            self._bucket(chat_id).take()
+            self._in_flight.add(chat_id)
+            asyncio.create_task(self._deliver(chat_id, self._queues[chat_id].popleft()))
+
+    async def _deliver(self, chat_id: int, item: dict):
+        requeue = False
+        try:
+            text = item["text"]
+            if item["count"] > 1 and item["ack_many"]:
+                text = item["ack_many"].format(n=item["count"])
+            msg = await self.bot.send_message(chat_id, text, **item["kwargs"])
+            self.sent += 1
+            if not item["future"].done():
+                item["future"].set_result(msg)
+        except TelegramRetryAfter as e:
+            self.retried += 1
+            self._bucket(chat_id).blocked_until = time.monotonic() + e.retry_after
+            requeue = True
+        except (TelegramNetworkError, TelegramServerError) as e:
+            item["attempts"] += 1
+            requeue = item["attempts"] < _MAX_ATTEMPTS
+            if not requeue:
+                log.warning("giving up on message to chat %s: %s", chat_id, e)
+                self._fail(item, e)
+            else:
+                self.retried += 1
+                self._bucket(chat_id).blocked_until = time.monotonic() + item["attempts"]
+        except Exception as e:
+            log.warning("dropping message to chat %s: %s", chat_id, e)
+            self._fail(item, e)
+        finally:
+            self._slots.release()
+            self._in_flight.discard(chat_id)
+            q = self._queues[chat_id]
+            if requeue:
+                q.appendleft(item)
+            if q:
+                self._ready.append(chat_id)
+                self._wake.set()
+            else:
+                del self._queues[chat_id]
+
+    def _fail(self, item: dict, exc: Exception):
+        self.dropped += 1
+        if not item["future"].done():
+            item["future"].set_exception(exc)
+            item["future"].exception()  # mark retrieved: most callers fire and forget
+
+    def stats(self) -> str:
+        return (f"depth={self.depth()} chats={len(self._queues)} sent={self.sent} "
+                f"retried={self.retried} coalesced={self.coalesced} dropped={self.dropped}")
@@ -0,0 +1,132 @@
+import asyncio, logging
+from sqlalchemy import select, update, desc
+
+from .db import AsyncSessionLocal, dialect_insert
+from .models import Score, User, Wallet, Payout
+from .solana_payouts import TransferNotSent
+from .utils.config import settings
+
+log = logging.getLogger(__name__)
+
+# Placeholder pool in smallest token units (change to your SPL decimals).
+POOL = 1_000_000
+# Statuses that may be (re)submitted. "submitting" and "unknown" are deliberately
+# absent: the transfer may have gone out (before a crash, or despite an RPC error),
+# so they need a manual check. "failed" is only recorded for TransferNotSent.
+_RESUBMIT = ("pending", "failed", "dry_run")
+
+def _name(username: str | None, tg_id: int) -> str:
+    return f"@{username or tg_id}"
+
+async def _record(payout_id: int, **values):
+    async with AsyncSessionLocal() as s:
+        await s.execute(update(Payout).where(Payout.id == payout_id).values(**values))
+        await s.commit()
+
+async def _claim(payout_id: int) -> bool:
+    """Mark a row "submitting" if it is still payable; False when another run got to it first."""
+    async with AsyncSessionLocal() as s:
+        res = await s.execute(update(Payout).where(Payout.id == payout_id, Payout.status.in_(_RESUBMIT))
+                              .values(status="submitting"))
+        await s.commit()
+    return res.rowcount == 1
+
+async def run_payouts(week_key: str, client, winners: int | None = None, pool: int = POOL,
+                      dry_run: bool | None = None, concurrency: int | None = None) -> list[str]:
+    """Pay the week's top ``winners`` proportionally to points; returns report lines.
+
+    The first run for a week picks the recipients and amounts from one
+    query and writes a ``payouts`` row for each before any transfer. From
+    then on that set is frozen: a re-run pays only those rows still pending,
+    dry-run or failed before broadcast, using the stored amounts, and
+    ignores how the standings have moved since. A transfer that raised
+    anything else is marked "unknown" and left for a manual check. Transfers go out concurrently through
+    ``client.transfer_spl`` in worker threads, at most ``concurrency`` at a
+    time, and each result is recorded as it lands. Each row is claimed with
+    a conditional update before its transfer, so overlapping runs never pay
+    a row twice.
+    """
+    winners = winners or settings.winners_count
+    dry_run = settings.payouts_dry_run if dry_run is None else dry_run
+    concurrency = concurrency or settings.payout_concurrency
+    lines = [f"Payouts for {week_key} (pool={pool} units, dry_run={dry_run}):"]
+
+    async with AsyncSessionLocal() as s:
+        frozen = (await s.execute(select(Payout.id).where(Payout.week_key == week_key).limit(1))).first()
+        if frozen:
+            lines.append("Recipients were fixed by the first run this week; current standings are ignored.")
+        else:
+            rows = (await s.execute(
+                select(Score.user_id, Score.points, User.tg_id, User.username, Wallet.address)
+                .join(User, User.id == Score.user_id)
+                .outerjoin(Wallet, Wallet.user_id == Score.user_id)
+                .where(Score.week_key == week_key)
+                .order_by(desc(Score.points)).limit(winners)
+            )).all()
+            if not rows:
+                return ["No scores to pay out."]
+            total_pts = sum(r.points for r in rows)
+            if total_pts == 0:
+                return ["Top players have 0 points; nothing to pay."]
+            planned = []
+            for r in rows:
+                if not r.address:
+                    lines.append(f"- {_name(r.username, r.tg_id)}: NO WALLET ON FILE -> skipped")
+                    continue
+                planned.append({"week_key": week_key, "user_id": r.user_id, "address": r.address,
+                                "amount": int(pool * (r.points / total_pts)), "status": "pending"})
+            if planned:
+                insert = dialect_insert(s.bind)
+                await s.execute(insert(Payout).on_conflict_do_nothing(index_elements=[Payout.week_key, Payout.user_id]), planned)
+                await s.commit()
+        rows = (await s.execute(
+            select(Payout, User.tg_id, User.username).join(User, User.id == Payout.user_id)
+            .where(Payout.week_key == week_key).order_by(desc(Payout.amount))
+        )).all()
+
+    payouts = [p for p, _, _ in rows]
+    names = {p.user_id: _name(username, tg_id) for p, tg_id, username in rows}
+    committed = sum(p.amount for p in payouts)
+    if committed > pool:
+        # two first runs raced on different standings: don't guess which set is right
+        return lines + [f"STOPPED: {len(payouts)} payout rows total {committed} units, over the pool; "
+                        f"fix the payouts table for {week_key} by hand."]
+
+    todo = []
+    for p in payouts:
+        if p.status == "sent":
+            lines.append(f"- {names[p.user_id]}: {p.amount} already paid -> {p.tx_sig}")
+        elif p.status in ("submitting", "unknown"):
+            lines.append(f"- {names[p.user_id]}: {p.amount} IN FLIGHT OR UNKNOWN (check chain; set status manually)")
+        else:
+            todo.append(p)
+
+    sem = asyncio.Semaphore(concurrency)
+
+    async def pay(p: Payout) -> str:
+        async with sem:
+            if not await _claim(p.id):
+                return f"- {names[p.user_id]}: {p.amount} skipped (being paid by another run)"
+            try:
+                sig = await asyncio.to_thread(
+                    client.transfer_spl,
+                    mint=settings.strip_mint or "MINT_PLACEHOLDER",
+                    treasury_key=settings.treasury_private_key or "KEY_PLACEHOLDER",
+                    to_wallet=p.address,
+                    amount=p.amount,
+                    dry_run=dry_run,
+                )
+            except TransferNotSent as e:
+                log.warning("payout %s to %s not sent: %s", p.id, p.address, e)
+                await _record(p.id, status="failed")
+                return f"- {names[p.user_id]}: {p.amount} FAILED, not sent ({e}); a re-run retries it"
+            except Exception as e:
+                # a timeout or dropped connection may come after the broadcast
+                log.warning("payout %s to %s has an unknown outcome: %s", p.id, p.address, e)
+                await _record(p.id, status="unknown")
+                return f"- {names[p.user_id]}: {p.amount} UNKNOWN ({e}) (check chain; set status manually)"
+            await _record(p.id, status="dry_run" if dry_run else "sent", tx_sig=sig)
+            return f"- {names[p.user_id]}: {p.amount} -> {sig}"
+
+    lines.extend(await asyncio.gather(*(pay(p) for p in todo)))
+    return lines
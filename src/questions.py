@@ -0,0 +1,190 @@
+"""Question storage: bulk import into the ``questions`` table and random sampling.
+
+Import one or more dumps (JSON array, JSONL or CSV; local or OpenTDB schema):
+
+    python -m src.questions data/dump.jsonl more.csv [--category Music]
+"""
+import argparse, csv, hashlib, html, json, os, random, sys
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from .db import SessionLocal, dialect_insert, ensure_schema
+from .models import Question
+from .seen import next_unseen
+from .utils.config import settings
+
+_BATCH = 1000
+_OPTS = ("opt_a", "opt_b", "opt_c", "opt_d")
+
+def content_hash(prompt: str, options) -> str:
+    # Option order is irrelevant for identity: the same question shuffled is still a duplicate.
+    norm = [prompt.strip().lower()] + sorted(o.strip().lower() for o in options)
+    return hashlib.sha256("\x1f".join(norm).encode("utf-8")).hexdigest()
+
+def to_row(item: dict, default_category: str = "Music") -> dict:
+    """Normalize a local-schema (opt_a..opt_d) or OpenTDB-schema record into a questions row."""
+    if "question" in item:
+        prompt = html.unescape(item["question"])
+        correct = html.unescape(item["correct_answer"])
+        opts = [html.unescape(x) for x in item["incorrect_answers"]] + [correct]
+        random.shuffle(opts)
+        row = dict(zip(_OPTS, opts))
+        row["correct_opt"] = "ABCD"[opts.index(correct)]
+    else:
+        prompt = item["prompt"]
+        row = {k: item[k] for k in _OPTS}
+        row["correct_opt"] = item["correct_opt"].strip().upper()
+    if row["correct_opt"] not in ("A", "B", "C", "D"):
+        raise ValueError(f"bad correct_opt {row['correct_opt']!r}")
+    row["prompt"] = prompt
+    row["category"] = html.unescape(item.get("category") or default_category)
+    row["content_hash"] = content_hash(prompt, [row[k] for k in _OPTS])
+    return row
+
+def _iter_json_array(f, chunk_size: int = 1 << 16):
+    # Incremental decode of a top-level JSON array so big dumps never sit in memory whole.
+    dec = json.JSONDecoder()
+    buf, pos, started, eof = "", 0, False, False
+    while True:
+        if not eof and len(buf) - pos < chunk_size:
+            more = f.read(chunk_size)
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+        while pos < len(buf) and buf[pos] in " \t\r\n,":
+            pos += 1
+        if not started:
+            if pos < len(buf):
+                if buf[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                started, pos = True, pos + 1
+            elif eof:
+                return
+            continue
+        if pos < len(buf) and buf[pos] == "]":
+            return
+        if pos >= len(buf):
+            if eof:
+                return
+            continue
+        try:
+            obj, end = dec.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more = f.read(chunk_size)  # object straddles the chunk boundary
+            eof = not more
+            buf = buf[pos:] + more
+            pos = 0
+            continue
+        yield obj
+        pos = end
+
+def iter_records(path: str):
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            yield from csv.DictReader(f)
+        elif ext in (".jsonl", ".ndjson"):
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for obj in _iter_json_array(f):
+                # OpenTDB API responses wrap the list in {"results": [...]}
+                yield from (obj.get("results", [obj]) if isinstance(obj, dict) and "results" in obj else [obj])
+
+def import_questions(session: Session, records, default_category: str = "Music") -> tuple[int, int, int]:
+    """Insert records in batches, skipping duplicates. Returns (read, inserted, rejected)."""
+    insert = dialect_insert(session.get_bind())
+    read = inserted = rejected = 0
+    batch: dict[str, dict] = {}
+
+    def flush():
+        nonlocal inserted
+        if not batch:
+            return
+        stmt = insert(Question).on_conflict_do_nothing(index_elements=[Question.content_hash])
+        inserted += session.connection().execute(stmt, list(batch.values())).rowcount or 0
+        session.commit()
+        batch.clear()
+
+    for rec in records:
+        read += 1
+        try:
+            row = to_row(rec, default_category)
+        except (KeyError, ValueError, TypeError, AttributeError):
+            rejected += 1
+            continue
+        batch[row["content_hash"]] = row
+        if len(batch) >= _BATCH:
+            flush()
+    flush()
+    return read, inserted, rejected
+
+def _as_dict(q: Question) -> dict:
+    return {
+        "id": q.id,
+        "category": q.category,
+        "prompt": q.prompt,
+        "options": {"A": q.opt_a, "B": q.opt_b, "C": q.opt_c, "D": q.opt_d},
+        "correct_opt": q.correct_opt,
+    }
+
+def id_bounds(session: Session, category: str | None = None) -> tuple[int, int] | None:
+    q = select(func.min(Question.id), func.max(Question.id))
+    if category:
+        q = q.where(Question.category == category)
+    lo, hi = session.execute(q).one()
+    return None if lo is None else (lo, hi)
+
+def sample_questions(session: Session, n: int, category: str | None = None,
+                     bounds: tuple[int, int] | None = None, seen: int = 0) -> list[dict]:
+    """Pick up to ``n`` distinct random questions without ``ORDER BY random()``.
+
+    Each pick draws a random id in [min, max], moves it to the next id not
+    set in the ``seen`` bitset, and seeks to the first row at or above it
+    through the (category, id) / primary-key index. Cost is a few index
+    lookups per pick regardless of table size or how much has been seen.
+    """
+    bounds = bounds or id_bounds(session, category)
+    if not bounds:
+        return []
+    lo, hi = bounds
+    picked: dict[int, Question] = {}
+    for _ in range(n * 4):
+        if len(picked) >= n:
+            break
+        r = next_unseen(seen, random.randint(lo, hi))
+        if r > hi:
+            r = next_unseen(seen, lo)  # wrap around
+            if r > hi:
+                break  # everything in range has been seen
+        q = select(Question).where(Question.id >= r)
+        if category:
+            q = q.where(Question.category == category)
+        row = session.execute(q.order_by(Question.id).limit(1)).scalar_one_or_none()
+        if row is None:
+            hi = r - 1  # nothing left at or above r
+            continue
+        # ids in [r, row.id) don't exist (or belong to another category): never draw them again
+        seen |= ((1 << (row.id - r)) - 1) << r
+        if (seen >> row.id) & 1:
+            continue
+        picked[row.id] = row
+        seen |= 1 << row.id
+    return [_as_dict(q) for q in picked.values()]
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m src.questions", description="Bulk-import trivia questions.")
+    ap.add_argument("files", nargs="+", help="JSON array, JSONL or CSV dumps")
+    ap.add_argument("--category", default="Music", help="category for records that have none")
+    args = ap.parse_args(argv)
+    ensure_schema(settings.db_auto_migrate)
+    with SessionLocal() as s:
+        for path in args.files:
+            read, inserted, rejected = import_questions(s, iter_records(path), args.category)
+            print(f"{path}: read={read} inserted={inserted} duplicates={read - inserted - rejected} rejected={rejected}")
+
+if __name__ == "__main__":
+    sys.exit(main())
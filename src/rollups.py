@@ -0,0 +1,61 @@
+"""All-time, monthly and per-chat standings kept as incremental rollups.
+
+Each reveal adds its (points, correct, wrong) deltas to five rows per
+player: this chat's week, month and all-time, plus the all-chats month and
+all-time (the all-chats week is ``scores`` itself). A board is then one
+range scan of ``ix_rollups_top``, however much history there is.
+"""
+from datetime import datetime, timezone
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from .db import dialect_insert
+from .models import StatRollup, User
+
+ALL_TIME = "all"
+ALL_CHATS = 0
+
+def month_key(now: datetime | None = None) -> str:
+    now = now or datetime.now(timezone.utc)
+    return f"{now.year}-{now.month:02d}"
+
+def rollup_keys(chat_id: int, week_key: str, month: str) -> list[tuple[str, int]]:
+    return [(week_key, chat_id), (month, chat_id), (ALL_TIME, chat_id), (month, ALL_CHATS), (ALL_TIME, ALL_CHATS)]
+
+def apply_rollup_deltas(session: Session, chat_id: int, week_key: str, deltas: dict, month: str | None = None):
+    """Add ``{user_id: (points, correct, wrong, ...)}`` onto the rollups; the caller commits."""
+    if not deltas:
+        return
+    keys = rollup_keys(chat_id, week_key, month or month_key())
+    rows = [
+        {"period": period, "chat_id": cid, "user_id": uid, "points": d[0], "correct": d[1], "wrong": d[2]}
+        for uid, d in deltas.items()
+        for period, cid in keys
+    ]
+    t = StatRollup.__table__
+    stmt = dialect_insert(session.get_bind())(t)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[t.c.period, t.c.chat_id, t.c.user_id],
+        set_={
+            "points": t.c.points + stmt.excluded.points,
+            "correct": t.c.correct + stmt.excluded.correct,
+            "wrong": t.c.wrong + stmt.excluded.wrong,
+        },
+    )
+    session.connection().execute(stmt, rows)
+
+def top(session: Session, period: str, chat_id: int = ALL_CHATS, n: int = 15) -> list[tuple[str | None, int, int, int, int]]:
+    """Best ``n`` as (username, tg_id, points, correct, wrong)."""
+    best = (
+        select(StatRollup.user_id, StatRollup.points, StatRollup.correct, StatRollup.wrong)
+        .where(StatRollup.period == period, StatRollup.chat_id == chat_id)
+        .order_by(StatRollup.points.desc(), StatRollup.user_id)
+        .limit(n)
+        .subquery()
+    )
+    rows = session.execute(
+        select(User.username, User.tg_id, best.c.points, best.c.correct, best.c.wrong)
+        .join(User, User.id == best.c.user_id)
+        .order_by(best.c.points.desc(), best.c.user_id)
+    )
+    return [tuple(r) for r in rows]
@@ -0,0 +1,203 @@
+"""Where in-flight round state lives: the current question, its deadline and the answers so far.
+
+``MemoryRoundStore`` is the single-process default. ``SqliteRoundStore``
+keeps the same state in a WAL-mode SQLite file that several worker processes
+(and a restarted worker) can share. Deadlines and answer timestamps are
+epoch seconds (``time.time()``) so they mean the same thing in every
+process; within a process the deadline is enforced by the monotonic
+DeadlineScheduler.
+"""
+import asyncio, time
+from abc import ABC, abstractmethod
+from contextlib import asynccontextmanager
+import aiosqlite
+
+class RoundStore(ABC):
+    @abstractmethod
+    async def try_lock(self, chat_id: int, ttl: float) -> bool:
+        """Claim a chat for a round; a lock older than ``ttl`` seconds counts as abandoned."""
+
+    @abstractmethod
+    async def unlock(self, chat_id: int):
+        """Release the chat's round lock."""
+
+    @abstractmethod
+    async def start_question(self, chat_id: int, correct: str, deadline: float, tag: str | None = None):
+        """Open a question for the chat, discarding any previous one and its answers.
+
+        ``tag`` is what the question's keyboard carries in its callback data.
+        """
+
+    @abstractmethod
+    async def get(self, chat_id: int) -> dict | None:
+        """``{"correct", "deadline", "tag"}`` of the open question, or None."""
+
+    @abstractmethod
+    async def add_answer(self, chat_id: int, tg_id: int, choice: str, ts: float) -> bool:
+        """Record a first answer; False if the user already answered this question."""
+
+    @abstractmethod
+    async def finish(self, chat_id: int) -> dict | None:
+        """Close the open question and return it with ``"answers": {tg_id: (choice, ts)}``."""
+
+    @abstractmethod
+    async def active(self) -> list[tuple[int, float]]:
+        """(chat_id, deadline) of every open question."""
+
+    async def close(self):
+        pass
+
+class MemoryRoundStore(RoundStore):
+    def __init__(self):
+        self._rounds: dict[int, dict] = {}
+        self._locks: dict[int, float] = {}
+
+    async def try_lock(self, chat_id, ttl):
+        now = time.time()
+        held = self._locks.get(chat_id)
+        if held is not None and now - held < ttl:
+            return False
+        self._locks[chat_id] = now
+        return True
+
+    async def unlock(self, chat_id):
+        self._locks.pop(chat_id, None)
+
+    async def start_question(self, chat_id, correct, deadline, tag=None):
+        self._rounds[chat_id] = {"correct": correct, "deadline": deadline, "tag": tag, "answers": {}}
+
+    async def get(self, chat_id):
+        return self._rounds.get(chat_id)
+
+    async def add_answer(self, chat_id, tg_id, choice, ts):
+        st = self._rounds.get(chat_id)
+        if st is None or tg_id in st["answers"]:
+            return False
+        st["answers"][tg_id] = (choice, ts)
+        return True
+
+    async def finish(self, chat_id):
+        return self._rounds.pop(chat_id, None)
+
+    async def active(self):
+        return [(c, st["deadline"]) for c, st in self._rounds.items()]
+
+    def __len__(self):
+        return len(self._rounds)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS round_locks (chat_id INTEGER PRIMARY KEY, locked_at REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS rounds (chat_id INTEGER PRIMARY KEY, correct TEXT NOT NULL, deadline REAL NOT NULL, tag TEXT);
+CREATE TABLE IF NOT EXISTS round_answers (
+    chat_id INTEGER NOT NULL, tg_id INTEGER NOT NULL, choice TEXT NOT NULL, ts REAL NOT NULL,
+    PRIMARY KEY (chat_id, tg_id)
+) WITHOUT ROWID;
+"""
+
+class SqliteRoundStore(RoundStore):
+    """Round state in a shared SQLite file (WAL, synchronous=NORMAL).
+
+    Answer dedupe is the (chat_id, tg_id) primary key with INSERT OR IGNORE,
+    so it holds across processes without any coordination in Python.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn: aiosqlite.Connection | None = None
+        # one connection per process: keep other coroutines' statements out of an open transaction
+        self._lock = asyncio.Lock()
+
+    @asynccontextmanager
+    async def _db(self, transaction: bool = False):
+        async with self._lock:
+            if self._conn is None:
+                conn = await aiosqlite.connect(self.path, isolation_level=None)
+                await conn.execute("PRAGMA journal_mode=WAL")
+                await conn.execute("PRAGMA synchronous=NORMAL")
+                await conn.execute("PRAGMA busy_timeout=5000")
+                await conn.executescript(_SCHEMA)
+                async with conn.execute("PRAGMA table_info(rounds)") as cur:
+                    if "tag" not in {row[1] for row in await cur.fetchall()}:  # file from before tags
+                        await conn.execute("ALTER TABLE rounds ADD COLUMN tag TEXT")
+                self._conn = conn
+            if not transaction:
+                yield self._conn
+                return
+            await self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._conn
+            except BaseException:
+                await self._conn.execute("ROLLBACK")
+                raise
+            await self._conn.execute("COMMIT")
+
+    async def try_lock(self, chat_id, ttl):
+        now = time.time()
+        async with self._db() as db:
+            cur = await db.execute(
+                "INSERT INTO round_locks (chat_id, locked_at) VALUES (?, ?) "
+                "ON CONFLICT (chat_id) DO UPDATE SET locked_at = excluded.locked_at "
+                "WHERE round_locks.locked_at < ?",
+                (chat_id, now, now - ttl),
+            )
+            return cur.rowcount == 1
+
+    async def unlock(self, chat_id):
+        async with self._db() as db:
+            await db.execute("DELETE FROM round_locks WHERE chat_id = ?", (chat_id,))
+
+    async def start_question(self, chat_id, correct, deadline, tag=None):
+        async with self._db(transaction=True) as db:
+            await db.execute("DELETE FROM round_answers WHERE chat_id = ?", (chat_id,))
+            await db.execute(
+                "INSERT INTO rounds (chat_id, correct, deadline, tag) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (chat_id) DO UPDATE SET correct = excluded.correct, deadline = excluded.deadline, "
+                "tag = excluded.tag",
+                (chat_id, correct, deadline, tag),
+            )
+
+    async def get(self, chat_id):
+        async with self._db() as db:
+            async with db.execute("SELECT correct, deadline, tag FROM rounds WHERE chat_id = ?", (chat_id,)) as cur:
+                row = await cur.fetchone()
+        return {"correct": row[0], "deadline": row[1], "tag": row[2]} if row else None
+
+    async def add_answer(self, chat_id, tg_id, choice, ts):
+        async with self._db() as db:
+            cur = await db.execute(
+                "INSERT OR IGNORE INTO round_answers (chat_id, tg_id, choice, ts) "
+                "SELECT ?, ?, ?, ? WHERE EXISTS (SELECT 1 FROM rounds WHERE chat_id = ?)",
+                (chat_id, tg_id, choice, ts, chat_id),
+            )
+            return cur.rowcount == 1
+
+    async def finish(self, chat_id):
+        async with self._db(transaction=True) as db:
+            async with db.execute("SELECT correct, deadline, tag FROM rounds WHERE chat_id = ?", (chat_id,)) as cur:
+                row = await cur.fetchone()
+            if row is None:
+                return None
+            async with db.execute("SELECT tg_id, choice, ts FROM round_answers WHERE chat_id = ?", (chat_id,)) as cur:
+                answers = {tg_id: (choice, ts) for tg_id, choice, ts in await cur.fetchall()}
+            await db.execute("DELETE FROM round_answers WHERE chat_id = ?", (chat_id,))
+            await db.execute("DELETE FROM rounds WHERE chat_id = ?", (chat_id,))
+        return {"correct": row[0], "deadline": row[1], "tag": row[2], "answers": answers}
+
+    async def active(self):
+        async with self._db() as db:
+            async with db.execute("SELECT chat_id, deadline FROM rounds") as cur:
+                return [(c, d) for c, d in await cur.fetchall()]
+
+    async def close(self):
+        async with self._lock:
+            if self._conn is not None:
+                await self._conn.close()
+                self._conn = None
+
+def make_round_store(spec: str) -> RoundStore:
+    """``memory`` (default) or ``sqlite:<path>``."""
+    if not spec or spec == "memory":
+        return MemoryRoundStore()
+    if spec.startswith("sqlite:"):
+        return SqliteRoundStore(spec[len("sqlite:"):])
+    raise ValueError(f"unknown ROUND_STORE {spec!r}")
@@ -1,48 +1,112 @@
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from datetime import datetime, timezone
-import csv, os
+import asyncio, csv, gzip, io, os, tempfile
 from sqlalchemy import select, desc
-from sqlalchemy.orm import Session
-from .db import SessionLocal
+from .db import engine, SessionLocal
+from .archive import archive_weeks, closed_weeks
 from .models import Score, User
 from .utils.config import settings
 
+_HEADER = ["rank","tg_id","username","points","correct","wrong"]
+# Rows fetched per round trip while streaming an export.
+_EXPORT_BATCH = 2000
+
 def _week_key(dt: datetime) -> str:
     year, week, _ = dt.isocalendar()
     return f"{year}-W{week:02d}"
 
-def _weekly_csv_path(week_key: str) -> str:
+def _weekly_csv_path(week_key: str, label: str | None = None) -> str:
     base = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
     os.makedirs(base, exist_ok=True)
-    return os.path.join(base, f"leaderboard_{week_key}.csv")
+    return os.path.join(base, f"leaderboard_{week_key}{'_' + label if label else ''}.csv")
+
+def _temp_beside(path: str) -> str:
+    fd, tmp = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp", dir=os.path.dirname(path))
+    os.close(fd)
+    return tmp
 
-def export_weekly_csv(session: Session, week_key: str):
-    q = session.execute(
-        select(Score, User)
+def export_weekly_csv(week_key: str, archive: bool | None = None, label: str | None = None) -> str:
+    """Write the week's standings to data/leaderboard_<week>.csv and return its path.
+
+    Rows are streamed from the DB in batches (server-side cursor on Postgres)
+    and written through a temp file that is renamed into place, so memory use
+    does not grow with the number of scores and readers never see a partial
+    file. With ``archive`` (default EXPORT_ARCHIVE) a gzip copy
+    ``.csv.gz`` is written from the same pass. A ``label`` makes it
+    leaderboard_<week>_<label>.csv, for snapshots the week's own export must
+    not overwrite. Blocking: run it off the event loop, e.g. via
+    ``export_weekly_csv_async``.
+    """
+    archive = settings.export_archive if archive is None else archive
+    path = _weekly_csv_path(week_key, label)
+    tmp = _temp_beside(path)
+    tmp_gz = _temp_beside(path + ".gz") if archive else None
+    q = (
+        select(User.tg_id, User.username, Score.points, Score.correct, Score.wrong)
         .join(User, User.id == Score.user_id)
         .where(Score.week_key == week_key)
         .order_by(desc(Score.points))
-    ).all()
-    path = _weekly_csv_path(week_key)
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        w = csv.writer(f)
-        w.writerow(["rank","tg_id","username","points","correct","wrong"])
-        for idx, (s,u) in enumerate(q, start=1):
-            w.writerow([idx, u.tg_id, u.username or "", s.points, s.correct, s.wrong])
+    )
+    try:
+        with engine.connect() as conn, open(tmp, "w", newline="", encoding="utf-8") as f:
+            gz = gzip.open(tmp_gz, "wt", compresslevel=6, newline="", encoding="utf-8") if tmp_gz else None
+            try:
+                # format each batch once, then hand the same chunk to both files
+                buf = io.StringIO()
+                w = csv.writer(buf)
+                w.writerow(_HEADER)
+                result = conn.execution_options(yield_per=_EXPORT_BATCH).execute(q)
+                idx = 0
+                for part in result.partitions():
+                    for tg_id, username, points, correct, wrong in part:
+                        idx += 1
+                        w.writerow((idx, tg_id, username or "", points, correct, wrong))
+                    chunk = buf.getvalue()
+                    buf.seek(0); buf.truncate()
+                    f.write(chunk)
+                    if gz:
+                        gz.write(chunk)
+                chunk = buf.getvalue()  # header only, for an empty week
+                f.write(chunk)
+                if gz:
+                    gz.write(chunk)
+            finally:
+                if gz:
+                    gz.close()
+        os.replace(tmp, path)
+        if tmp_gz:
+            os.replace(tmp_gz, path + ".gz")
+    except BaseException:
+        for t in (tmp, tmp_gz):
+            if t and os.path.exists(t):
+                os.remove(t)
+        raise
     return path
 
-def schedule_jobs(bot):
+async def export_weekly_csv_async(week_key: str, archive: bool | None = None, label: str | None = None) -> str:
+    return await asyncio.to_thread(export_weekly_csv, week_key, archive, label)
+
+def schedule_jobs(bot, weekly: bool = True) -> AsyncIOScheduler:
+    """Start the process's scheduler; auto-rounds add their jobs to the returned instance."""
     sched = AsyncIOScheduler(timezone="UTC")
-    # Export every Sunday 23:55 UTC by default (configurable by WEEKLY_RESET_DAY if desired)
-    # For simplicity, keep Sunday cron here.
-    sched.add_job(weekly_finalize, "cron", day_of_week="sun", hour=23, minute=55, args=[bot])
+    if weekly:
+        # Export at 23:55 UTC on WEEKLY_RESET_DAY (SUN by default)
+        day = settings.weekly_reset_day[:3].lower()
+        sched.add_job(weekly_finalize, CronTrigger(day_of_week=day, hour=23, minute=55, timezone="UTC"), args=[bot])
     sched.start()
+    return sched
+
+def _archive_closed(current_week: str) -> int:
+    with SessionLocal() as s:
+        return archive_weeks(s, closed_weeks(s, current_week))
 
 async def weekly_finalize(bot):
     now = datetime.now(timezone.utc)
     wk = _week_key(now)
-    with SessionLocal() as s:
-        csv_path = export_weekly_csv(s, wk)
+    csv_path = await export_weekly_csv_async(wk)
+    # earlier weeks are final by now; keep scores down to the week being played
+    await asyncio.to_thread(_archive_closed, wk)
     # DM admins a notice
     for admin in getattr(bot, 'admin_ids', []):
         try:
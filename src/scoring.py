@@ -0,0 +1,150 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import case, select
+from sqlalchemy.orm import Session
+
+from .db import dialect_insert
+from .models import ChatSettled, User, Score
+from .rollups import apply_rollup_deltas
+
+# Rows per INSERT statement; keeps us well under SQLite's bound-parameter limit.
+_CHUNK = 500
+
+# Scoring rules (see README "Scoring"); the streak bonus cap is STREAK_BONUS_CAP.
+BASE_POINTS = 10
+TIME_BONUS_MAX = 5
+STREAK_STEP = 2
+
+def _chunks(items: list, size: int = _CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def resolve_users(session: Session, tg_ids) -> dict[int, User]:
+    """Map Telegram ids to User rows with one SELECT per chunk (not one per user)."""
+    ids = list(set(tg_ids))
+    found: dict[int, User] = {}
+    for part in _chunks(ids):
+        for u in session.execute(select(User).where(User.tg_id.in_(part))).scalars():
+            found[u.tg_id] = u
+    return found
+
+def score_answers(choices: np.ndarray, times: np.ndarray, streaks: np.ndarray, correct: str,
+                  opened: float, window: float, streak_cap: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score every answer to one question at once.
+
+    ``choices`` are option letters as uint8 (``b"A"``..``b"D"``), ``times``
+    epoch answer times and ``streaks`` each player's streak going in. A
+    correct answer earns BASE_POINTS, a time bonus of up to TIME_BONUS_MAX
+    falling linearly over the answer window, and STREAK_STEP per correct
+    answer already in the streak (at most ``streak_cap``); it extends the
+    streak. A wrong answer earns nothing and resets the streak. Returns
+    ``(points, hit, new_streaks)`` aligned with the inputs.
+    """
+    hit = choices == ord(correct)
+    left = 1.0 - np.clip(times - opened, 0.0, window) / window
+    bonus = np.rint(TIME_BONUS_MAX * left).astype(np.int64) + np.minimum(STREAK_STEP * streaks, streak_cap)
+    points = np.where(hit, BASE_POINTS + bonus, 0)
+    return points, hit, np.where(hit, streaks + 1, 0)
+
+def current_streaks(session: Session, week_key: str, user_ids) -> dict[int, int]:
+    """Weekly streak per user id (users without a score row are absent).
+
+    The rows stay locked (``FOR UPDATE``; a no-op on SQLite, where the
+    reveal already holds the write lock) until the reveal commits, so a
+    player's reveals in two chats can't both start from the same streak.
+    Ids are locked in ascending order to keep concurrent reveals from
+    deadlocking.
+    """
+    ids = sorted(user_ids)
+    found: dict[int, int] = {}
+    for part in _chunks(ids):
+        rows = session.execute(select(Score.user_id, Score.streak)
+                               .where(Score.week_key == week_key, Score.user_id.in_(part))
+                               .order_by(Score.user_id).with_for_update())
+        for uid, streak in rows:
+            found[uid] = streak
+    return found
+
+def mark_settled(session: Session, chat_id: int, deadline_ms: int) -> bool:
+    """Record the chat's question as scored (uncommitted); False if it, or a later one, already was."""
+    insert = dialect_insert(session.get_bind())
+    t = ChatSettled.__table__
+    stmt = insert(t).values(chat_id=chat_id, deadline_ms=deadline_ms)
+    stmt = stmt.on_conflict_do_update(index_elements=[t.c.chat_id], set_={"deadline_ms": stmt.excluded.deadline_ms},
+                                      where=t.c.deadline_ms < stmt.excluded.deadline_ms)
+    return session.connection().execute(stmt).rowcount == 1
+
+def score_question(session: Session, week_key: str, answers: dict[int, tuple[str, float]], correct: str,
+                   opened: float, window: float, streak_cap: int, chat_id: int | None = None,
+                   deadline_ms: int | None = None):
+    """Score one revealed question and commit it.
+
+    ``answers`` is ``{tg_id: (choice, ts)}``. With ``chat_id`` the deltas also
+    go into the all-time/monthly/per-chat rollups, in the same transaction.
+    With ``deadline_ms`` too, the question is marked settled in that
+    transaction, and None is returned if it already was (a replay).
+    Otherwise returns ``(users, awarded,
+    totals)``: the resolved User rows by tg_id, points earned by each correct
+    user id, and the new weekly totals (as from ``apply_score_deltas``).
+    """
+    users = resolve_users(session, answers.keys())
+    tg_ids = [tg for tg in answers if tg in users]
+    if not tg_ids:
+        return users, {}, {}
+    if chat_id is not None and deadline_ms is not None and not mark_settled(session, chat_id, deadline_ms):
+        session.rollback()
+        return None
+    uids = np.fromiter((users[tg].id for tg in tg_ids), dtype=np.int64, count=len(tg_ids))
+    choices = np.frombuffer("".join(answers[tg][0] for tg in tg_ids).encode("ascii"), dtype=np.uint8)
+    times = np.fromiter((answers[tg][1] for tg in tg_ids), dtype=np.float64, count=len(tg_ids))
+    prior = current_streaks(session, week_key, uids.tolist())
+    streaks = np.fromiter((prior.get(u, 0) for u in uids.tolist()), dtype=np.int64, count=len(tg_ids))
+
+    points, hit, new_streaks = score_answers(choices, times, streaks, correct, opened, window, streak_cap)
+
+    deltas = {
+        uid: (p, int(h), int(not h), s)
+        for uid, p, h, s in zip(uids.tolist(), points.tolist(), hit.tolist(), new_streaks.tolist())
+    }
+    awarded = {uid: d[0] for uid, d in deltas.items() if d[1]}
+    if chat_id is not None:
+        apply_rollup_deltas(session, chat_id, week_key, deltas)
+    return users, awarded, apply_score_deltas(session, week_key, deltas)
+
+def apply_score_deltas(session: Session, week_key: str, deltas: dict[int, tuple[int, int, int, int]]) -> dict[int, tuple[int, int, int, int]]:
+    """Add (points, correct, wrong) deltas to each user's weekly score row and extend or reset its streak.
+
+    Missing rows are created on the fly via INSERT ... ON CONFLICT on
+    ``uq_user_week``, executed as one batched executemany, so the whole
+    reveal is a handful of statements and a single commit regardless of how
+    many people answered. Returns the new
+    ``(points, correct, wrong, streak)`` totals per user id.
+    """
+    totals: dict[int, tuple[int, int, int, int]] = {}
+    if not deltas:
+        return totals
+    insert = dialect_insert(session.get_bind())
+    now = datetime.utcnow()
+    rows = [
+        {"user_id": uid, "week_key": week_key, "points": p, "correct": c,
+         "wrong": w, "streak": s, "updated_at": now}
+        for uid, (p, c, w, s) in deltas.items()
+    ]
+    t = Score.__table__
+    stmt = insert(t)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[t.c.user_id, t.c.week_key],
+        set_={
+            "points": t.c.points + stmt.excluded.points,
+            "correct": t.c.correct + stmt.excluded.correct,
+            "wrong": t.c.wrong + stmt.excluded.wrong,
+            # from the row itself, not the value read earlier: a right answer extends, a wrong one resets
+            "streak": case((stmt.excluded.correct == 1, t.c.streak + 1), else_=0),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(t.c.user_id, t.c.points, t.c.correct, t.c.wrong, t.c.streak)
+    # Core executemany: compiled once, sent as multi-row VALUES batches ("insertmanyvalues")
+    for uid, points, correct, wrong, streak in session.connection().execute(stmt, rows):
+        totals[uid] = (points, correct, wrong, streak)
+    session.commit()
+    return totals
@@ -0,0 +1,69 @@
+from datetime import datetime, timezone
+from sqlalchemy import select, delete
+
+from .db import AsyncSessionLocal, dialect_insert
+from .models import ChatSeen
+
+def _current_week() -> str:
+    y, w, _ = datetime.now(timezone.utc).isocalendar()
+    return f"{y}-W{w:02d}"
+
+def next_unseen(bits: int, start: int) -> int:
+    """Smallest i >= start whose bit is clear (Python ints are infinite two's complement)."""
+    free = ~(bits >> start)
+    return start + (free & -free).bit_length() - 1
+
+def to_bits(ids) -> int:
+    bits = 0
+    for i in ids:
+        bits |= 1 << i
+    return bits
+
+class SeenTracker:
+    """Per-chat set of question ids asked this ISO week.
+
+    Each chat holds one integer bitset in memory, persisted as a single
+    ``chat_seen`` row per (chat, week). A new week starts from an empty set
+    and drops the chat's older rows.
+    """
+
+    def __init__(self):
+        self._chats: dict[int, tuple[str, int]] = {}
+
+    async def get(self, chat_id: int) -> int:
+        wk = _current_week()
+        cached = self._chats.get(chat_id)
+        if cached and cached[0] == wk:
+            return cached[1]
+        async with AsyncSessionLocal() as s:
+            raw = (await s.execute(
+                select(ChatSeen.bits).where(ChatSeen.chat_id == chat_id, ChatSeen.week_key == wk)
+            )).scalar_one_or_none()
+            if raw is None:
+                # week rolled over (or first round here): forget previous weeks
+                await s.execute(delete(ChatSeen).where(ChatSeen.chat_id == chat_id, ChatSeen.week_key != wk))
+                await s.commit()
+        bits = int.from_bytes(raw or b"", "little")
+        self._chats[chat_id] = (wk, bits)
+        return bits
+
+    async def mark(self, chat_id: int, ids):
+        bits = await self.get(chat_id) | to_bits(ids)
+        await self._save(chat_id, bits)
+
+    async def reset(self, chat_id: int):
+        await self._save(chat_id, 0)
+
+    async def _save(self, chat_id: int, bits: int):
+        wk = _current_week()
+        self._chats[chat_id] = (wk, bits)
+        raw = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+        async with AsyncSessionLocal() as s:
+            insert = dialect_insert(s.bind)
+            stmt = insert(ChatSeen).values(chat_id=chat_id, week_key=wk, bits=raw)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[ChatSeen.chat_id, ChatSeen.week_key],
+                set_={"bits": stmt.excluded.bits},
+            )
+            await s.execute(stmt)
+            await s.commit()
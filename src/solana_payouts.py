@@ -1,5 +1,11 @@
 # Manual-payout stub: no Solana SDK needed
 
+class TransferNotSent(Exception):
+    """The transfer certainly never reached the network (e.g. failed to build, sign or simulate).
+
+    Any other exception from ``transfer_spl`` leaves the outcome unknown.
+    """
+
 class PayoutClient:
     def __init__(self, *args, **kwargs):
         # kept for compatibility with the rest of the code
@@ -0,0 +1,105 @@
+"""Per-user and per-chat command rate limits, applied before any handler runs.
+
+Limits are written ``command=N/SECONDS`` (N calls per SECONDS window, burst
+N), comma separated, with ``default`` for commands not listed; ``0`` turns a
+limit off. Callback queries are limited under the prefix of their data
+(``ans`` for answer-keyboard taps). Each key costs one float: the GCRA "theoretical arrival time".
+A key whose time has passed is indistinguishable from a new one, so those
+are swept out once a minute.
+"""
+import time
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery
+
+_SWEEP_EVERY = 60.0
+
+def parse_limits(spec: str) -> dict[str, tuple[float, float] | None]:
+    """``"answer=3/5,default=5/10"`` -> {command: (interval, tolerance) or None}."""
+    limits: dict[str, tuple[float, float] | None] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        cmd, _, rule = part.partition("=")
+        n, _, per = rule.partition("/")
+        n, per = float(n), float(per or 1)
+        # GCRA: one token every `interval`, up to n-1 banked on top of the current one
+        limits[cmd.strip().lower().lstrip("/")] = (per / n, per / n * (n - 1)) if n > 0 else None
+    return limits
+
+class _Limiter:
+    __slots__ = ("limits", "default", "tat")
+
+    def __init__(self, spec: str):
+        self.limits = parse_limits(spec)
+        self.default = self.limits.pop("default", None)
+        self.tat: dict[tuple[str, int], float] = {}
+
+    def rule(self, cmd: str):
+        return self.limits.get(cmd, self.default)
+
+    def sweep(self, now: float):
+        self.tat = {k: t for k, t in self.tat.items() if t > now}
+
+def _command(event) -> tuple[str, int] | None:
+    """(command, chat id) an update is limited under, or None for updates we don't limit."""
+    if isinstance(event, CallbackQuery):
+        chat_id = event.message.chat.id if event.message else event.from_user.id
+        return (event.data or "").partition(":")[0], chat_id
+    text = event.text
+    if not text or text[0] != "/" or event.from_user is None:
+        return None
+    head = text[1:].split(maxsplit=1)
+    return (head[0].partition("@")[0].lower() if head else ""), event.chat.id
+
+class ThrottleMiddleware(BaseMiddleware):
+    """Outer message/callback middleware: over-limit updates are dropped silently.
+
+    A dropped callback query is still answered, without text, so the
+    client's button stops spinning.
+
+    An update must fit both the sender's and the chat's bucket for its
+    command; only then are both charged, so a chat-wide limit doesn't burn
+    the sender's allowance.
+    """
+
+    def __init__(self, user_spec: str, chat_spec: str):
+        self.users = _Limiter(user_spec)
+        self.chats = _Limiter(chat_spec)
+        self.dropped = 0
+        self._next_sweep = time.monotonic() + _SWEEP_EVERY
+
+    def allow(self, cmd: str, user_id: int, chat_id: int, now: float) -> bool:
+        ur, cr = self.users.rule(cmd), self.chats.rule(cmd)
+        ukey, ckey = (cmd, user_id), (cmd, chat_id)
+        if ur:
+            ut = max(self.users.tat.get(ukey, now), now)
+            if ut - now > ur[1]:
+                return False
+        if cr:
+            ct = max(self.chats.tat.get(ckey, now), now)
+            if ct - now > cr[1]:
+                return False
+        if ur:
+            self.users.tat[ukey] = ut + ur[0]
+        if cr:
+            self.chats.tat[ckey] = ct + cr[0]
+        return True
+
+    async def __call__(self, handler, event, data):
+        key = _command(event)
+        if key is None:
+            return await handler(event, data)
+        now = time.monotonic()
+        if now >= self._next_sweep:
+            self.users.sweep(now)
+            self.chats.sweep(now)
+            self._next_sweep = now + _SWEEP_EVERY
+        if not self.allow(key[0], event.from_user.id, key[1], now):
+            self.dropped += 1
+            if isinstance(event, CallbackQuery):
+                await event.answer()
+            return None
+        return await handler(event, data)
+
+    def __len__(self):
+        return len(self.users.tat) + len(self.chats.tat)
@@ -0,0 +1,91 @@
+import asyncio, heapq, itertools, logging, time
+
+log = logging.getLogger(__name__)
+
+class DeadlineScheduler:
+    """One task that fires per-chat question deadlines on the monotonic clock.
+
+    Deadlines sit in a heap; rescheduling or cancelling a chat only replaces
+    its entry in ``_current`` and the stale heap entry is skipped when it
+    surfaces. Everything that is due at a wake-up is handed to ``callback``
+    as one batch, so thousands of active chats cost one sleeping task, not
+    thousands.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback  # async def callback(chat_id)
+        self._heap: list[tuple[float, int, int]] = []  # (deadline, seq, chat_id)
+        self._current: dict[int, tuple[float, int]] = {}  # chat_id -> (deadline, seq)
+        self._seq = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self.fired = 0
+
+    def schedule(self, chat_id: int, delay: float) -> float:
+        """(Re)arm ``chat_id`` to fire after ``delay`` seconds; returns the monotonic deadline."""
+        deadline = time.monotonic() + delay
+        seq = next(self._seq)
+        self._current[chat_id] = (deadline, seq)
+        heapq.heappush(self._heap, (deadline, seq, chat_id))
+        if self._heap[0][1] == seq:
+            self._wake.set()  # new earliest deadline: re-arm the sleeper
+        self._ensure_running()
+        return deadline
+
+    def cancel(self, chat_id: int):
+        self._current.pop(chat_id, None)
+
+    def deadline(self, chat_id: int) -> float | None:
+        cur = self._current.get(chat_id)
+        return cur[0] if cur else None
+
+    def remaining(self, chat_id: int) -> float | None:
+        d = self.deadline(chat_id)
+        return None if d is None else max(0.0, d - time.monotonic())
+
+    def pending(self) -> int:
+        return len(self._current)
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            # drop cancelled/rescheduled entries from the top
+            while self._heap and self._current.get(self._heap[0][2], (None, None))[1] != self._heap[0][1]:
+                heapq.heappop(self._heap)
+            if not self._heap:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            wait = self._heap[0][0] - time.monotonic()
+            if wait > 0:
+                self._wake.clear()
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            now = time.monotonic()
+            due = []
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, chat_id = heapq.heappop(self._heap)
+                cur = self._current.get(chat_id)
+                if cur and cur[1] == seq:
+                    del self._current[chat_id]
+                    due.append(chat_id)
+            if due:
+                self.fired += len(due)
+                asyncio.create_task(self._fire(due))
+
+    async def _fire(self, chat_ids: list[int]):
+        results = await asyncio.gather(*(self.callback(c) for c in chat_ids), return_exceptions=True)
+        for chat_id, r in zip(chat_ids, results):
+            if isinstance(r, Exception):
+                log.error("finalize failed for chat %s", chat_id, exc_info=r)
@@ -1,41 +1,193 @@
-import httpx, random, html, json, os
+import asyncio, random, html, os, time
+from collections import deque
 from typing import Literal
+import orjson
+
+from .utils.config import settings
+from .db import AsyncSessionLocal
+from .questions import id_bounds, sample_questions
+from .seen import SeenTracker
 
 Choice = Literal['A','B','C','D']
 
-async def fetch_music_questions(n: int = 5):
-    # Try local JSON first
-    local = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "questions.json")
-    if os.path.exists(local):
+LOCAL_QUESTIONS = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "questions.json")
+OPENTDB_MAX_AMOUNT = 50
+# How long a cached (min id, max id) of the questions table is trusted; the importer runs out of process.
+DB_BOUNDS_TTL = 60.0
+
+class QuestionBank:
+    """Question source shared by every /quiz.
+
+    The ``questions`` table wins when it has rows (see ``src.questions``);
+    with a ``chat_id`` it skips questions that chat already saw this week. The
+    local JSON file is parsed once and re-parsed only when its mtime
+    changes; questions are indexed by category. Without a local file, a
+    background task keeps a buffer of OpenTDB questions topped up through a
+    single pooled HTTP client, spacing calls by ``min_interval`` to respect
+    the upstream rate limit, so a round can start without waiting on the API.
+    """
+
+    def __init__(self, path: str = LOCAL_QUESTIONS, api_url: str | None = None,
+                 buffer_size: int | None = None, min_interval: float | None = None):
+        self.path = path
+        self.api_url = api_url or settings.opentdb_url
+        self.buffer_size = buffer_size if buffer_size is not None else settings.question_buffer_size
+        self.min_interval = min_interval if min_interval is not None else settings.opentdb_min_interval
+        self._mtime: float | None = None
+        self._items: list[dict] = []
+        self._by_category: dict[str, list[dict]] = {}
+        self._db_bounds: dict[str | None, tuple[tuple[int, int] | None, float]] = {}
+        self._buffer: deque[dict] = deque()
+        self._client: "httpx.AsyncClient | None" = None
+        self._remote_lock = asyncio.Lock()
+        self._next_call = 0.0
+        self._wanted = asyncio.Event()
+        self._refill_task: asyncio.Task | None = None
+
+    # --- local file ---
+
+    def _maybe_reload(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            if self._mtime is not None:
+                self._mtime, self._items, self._by_category = None, [], {}
+            return
+        if mtime == self._mtime:
+            return
+        try:
+            with open(self.path, "rb") as f:
+                items = [_normalize_local(i) for i in orjson.loads(f.read())]
+        except Exception:
+            return  # keep serving the last good copy (or fall back to remote)
+        by_cat: dict[str, list[dict]] = {}
+        for q in items:
+            by_cat.setdefault(q["category"].lower(), []).append(q)
+        self._mtime, self._items, self._by_category = mtime, items, by_cat
+
+    def categories(self) -> list[str]:
+        self._maybe_reload()
+        return sorted(self._by_category)
+
+    # --- questions table ---
+
+    async def _bounds(self, category: str | None):
+        cached = self._db_bounds.get(category)
+        if cached and time.monotonic() - cached[1] < DB_BOUNDS_TTL:
+            return cached[0]
         try:
-            with open(local, "r", encoding="utf-8") as f:
-                items = json.load(f)
-            return [_normalize_local(i) for i in random.sample(items, k=min(n, len(items)))]
+            async with AsyncSessionLocal() as s:
+                bounds = await s.run_sync(id_bounds, category)
         except Exception:
-            pass
-
-    # Fallback to OpenTDB: Category 12 = Music, type=multiple
-    url = f"https://opentdb.com/api.php?amount={n}&category=12&type=multiple"
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        data = r.json()
-    questions = []
-    for item in data.get("results", []):
-        prompt = html.unescape(item["question"])
-        correct = html.unescape(item["correct_answer"])
-        incorrect = [html.unescape(x) for x in item["incorrect_answers"]]
-        opts = incorrect + [correct]
-        random.shuffle(opts)
-        mapping = { 'A': opts[0], 'B': opts[1], 'C': opts[2], 'D': opts[3] }
-        correct_opt = [k for k,v in mapping.items() if v == correct][0]
-        questions.append({
-            "category": "Music",
-            "prompt": prompt,
-            "options": mapping,
-            "correct_opt": correct_opt
-        })
-    return questions
+            bounds = None  # table missing/unreachable: fall through to file/remote
+        self._db_bounds[category] = (bounds, time.monotonic())
+        return bounds
+
+    async def _sample_db(self, n: int, category: str | None, chat_id: int | None) -> list[dict]:
+        bounds = await self._bounds(category)
+        if not bounds:
+            return []
+        seen = await SEEN.get(chat_id) if chat_id is not None else 0
+        async with AsyncSessionLocal() as s:
+            qs = await s.run_sync(sample_questions, n, category, bounds, seen)
+            if not qs and seen:
+                # this chat has been through the whole pool this week: start over
+                await SEEN.reset(chat_id)
+                qs = await s.run_sync(sample_questions, n, category, bounds)
+        if chat_id is not None and qs:
+            await SEEN.mark(chat_id, [q["id"] for q in qs])
+        return qs
+
+    # --- remote ---
+
+    def _http(self) -> "httpx.AsyncClient":
+        if self._client is None:
+            import httpx  # OpenTDB is only a fallback: load the client on the first remote fetch
+            self._client = httpx.AsyncClient(timeout=10.0, limits=httpx.Limits(max_connections=2))
+        return self._client
+
+    async def _fetch_remote(self, n: int) -> list[dict]:
+        async with self._remote_lock:
+            wait = self._next_call - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                r = await self._http().get(self.api_url, params={
+                    "amount": min(n, OPENTDB_MAX_AMOUNT), "category": 12, "type": "multiple",
+                })
+            finally:
+                self._next_call = time.monotonic() + self.min_interval
+            r.raise_for_status()
+            data = r.json()
+        return [_normalize_opentdb(item) for item in data.get("results", [])]
+
+    async def _refill_loop(self):
+        # nothing is fetched (or the HTTP client even loaded) until a round first falls through to OpenTDB
+        await self._wanted.wait()
+        while True:
+            self._maybe_reload()
+            if self._items or await self._bounds(None) or len(self._buffer) >= self.buffer_size:
+                self._wanted.clear()
+                await self._wanted.wait()
+                continue
+            try:
+                self._buffer.extend(await self._fetch_remote(self.buffer_size - len(self._buffer)))
+            except Exception:
+                await asyncio.sleep(self.min_interval)
+
+    def start(self):
+        if self._refill_task is None:
+            self._refill_task = asyncio.create_task(self._refill_loop())
+
+    async def close(self):
+        if self._refill_task:
+            self._refill_task.cancel()
+            self._refill_task = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    # --- sampling ---
+
+    async def sample(self, n: int, category: str | None = None, chat_id: int | None = None) -> list[dict]:
+        qs = await self._sample_db(n, category, chat_id)
+        if qs:
+            return qs
+        self._maybe_reload()
+        pool = self._by_category.get(category.lower(), []) if category else self._items
+        if pool:
+            return random.sample(pool, k=min(n, len(pool)))
+
+        out = []
+        while self._buffer and len(out) < n:
+            out.append(self._buffer.popleft())
+        if len(out) < n:
+            # buffer ran dry (cold start or heavy use): fetch the shortfall directly
+            out.extend((await self._fetch_remote(n - len(out)))[:n - len(out)])
+        self._wanted.set()
+        return out
+
+# Per-chat "already asked this week" bitsets over questions-table ids.
+SEEN = SeenTracker()
+BANK = QuestionBank()
+
+async def fetch_music_questions(n: int = 5, chat_id: int | None = None):
+    return await BANK.sample(n, chat_id=chat_id)
+
+def _normalize_opentdb(item: dict):
+    prompt = html.unescape(item["question"])
+    correct = html.unescape(item["correct_answer"])
+    incorrect = [html.unescape(x) for x in item["incorrect_answers"]]
+    opts = incorrect + [correct]
+    random.shuffle(opts)
+    mapping = { 'A': opts[0], 'B': opts[1], 'C': opts[2], 'D': opts[3] }
+    correct_opt = [k for k,v in mapping.items() if v == correct][0]
+    return {
+        "category": "Music",
+        "prompt": prompt,
+        "options": mapping,
+        "correct_opt": correct_opt
+    }
 
 def _normalize_local(item: dict):
     mapping = {'A': item['opt_a'], 'B': item['opt_b'], 'C': item['opt_c'], 'D': item['opt_d']}
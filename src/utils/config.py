@@ -4,6 +4,12 @@ import os
 
 load_dotenv()
 
+# Project root; relative data paths resolve against it, not the working directory.
+_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def _data_path(value: str) -> str:
+    return os.path.join(_ROOT, value) if value and not os.path.isabs(value) else value
+
 class Settings(BaseModel):
     bot_token: str = os.getenv("BOT_TOKEN", "")
     admin_ids: list[int] = [int(x) for x in os.getenv("ADMIN_IDS", "").split(",") if x.strip().isdigit()]
@@ -12,9 +18,58 @@ class Settings(BaseModel):
     streak_bonus_cap: int = int(os.getenv("STREAK_BONUS_CAP", 10))
     weekly_reset_day: str = os.getenv("WEEKLY_RESET_DAY", "SUN").upper()
     winners_count: int = int(os.getenv("WINNERS_COUNT", 3))
+    user_cache_size: int = int(os.getenv("USER_CACHE_SIZE", 50000))
+    user_flush_seconds: int = int(os.getenv("USER_FLUSH_SECONDS", 30))
+    admin_cache_ttl: float = float(os.getenv("ADMIN_CACHE_TTL", 600))
+    # Also write a gzip copy of each weekly CSV export
+    export_archive: bool = os.getenv("EXPORT_ARCHIVE", "true").lower() == "true"
     payouts_dry_run: bool = os.getenv("PAYOUTS_DRY_RUN", "true").lower() == "true"
+    payout_concurrency: int = int(os.getenv("PAYOUT_CONCURRENCY", 8))
+
+    # Anti-spam: "command=N/SECONDS,..." per sender and per chat; excess commands are ignored
+    throttle_user: str = os.getenv("THROTTLE_USER", "answer=2/5,ans=3/5,leaderboard=1/10,myscore=1/10,default=5/10")
+    throttle_chat: str = os.getenv("THROTTLE_CHAT", "answer=100/1,ans=200/1,leaderboard=2/10,myscore=20/10,default=30/10")
+
+    # Outbound message pacing (Telegram: ~30 msg/s overall, ~1/s per chat, 20/min per group)
+    outbox_global_per_sec: float = float(os.getenv("OUTBOX_GLOBAL_PER_SEC", 25))
+    outbox_private_per_sec: float = float(os.getenv("OUTBOX_PRIVATE_PER_SEC", 1))
+    outbox_group_per_min: float = float(os.getenv("OUTBOX_GROUP_PER_MIN", 20))
+    outbox_ack_saturation: int = int(os.getenv("OUTBOX_ACK_SATURATION", 5))
+
+    # Remote question source (used when data/questions.json is absent)
+    opentdb_url: str = os.getenv("OPENTDB_URL", "https://opentdb.com/api.php")
+    opentdb_min_interval: float = float(os.getenv("OPENTDB_MIN_INTERVAL", 5))
+    question_buffer_size: int = int(os.getenv("QUESTION_BUFFER_SIZE", 50))
+
+    # Round state backend: "memory" (single process) or "sqlite:<path>" (shared by workers)
+    round_store: str = os.getenv("ROUND_STORE", "memory")
+    # Crash-safe log of open questions and answers, replayed on startup ("" = off; relative to the project root)
+    answer_journal: str = _data_path(os.getenv("ANSWER_JOURNAL", "data/answers.journal"))
+    # Scheduled rounds (/schedule): at most AUTO_ROUND_MAX_ACTIVE rounds run at once per process; the cap
+    # halves (down to AUTO_ROUND_MIN_ACTIVE) while the outbox holds more than AUTO_ROUND_OUTBOX_TARGET
+    # messages or reveals land more than AUTO_ROUND_FINALIZE_TARGET seconds after their deadline
+    auto_round_max_active: int = int(os.getenv("AUTO_ROUND_MAX_ACTIVE", 50))
+    auto_round_min_active: int = int(os.getenv("AUTO_ROUND_MIN_ACTIVE", 2))
+    auto_round_outbox_target: int = int(os.getenv("AUTO_ROUND_OUTBOX_TARGET", 200))
+    auto_round_finalize_target: float = float(os.getenv("AUTO_ROUND_FINALIZE_TARGET", 2.0))
+    auto_round_jitter: float = float(os.getenv("AUTO_ROUND_JITTER", 60))  # seconds either way per start
+    auto_round_min_minutes: int = int(os.getenv("AUTO_ROUND_MIN_MINUTES", 10))
+    # Webhook mode (python -m src.webhook): updates are sharded by chat_id across WORKERS processes
+    webhook_url: str = os.getenv("WEBHOOK_URL", "")
+    webhook_secret: str = os.getenv("WEBHOOK_SECRET", "")
+    webhook_host: str = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+    webhook_port: int = int(os.getenv("PORT", os.getenv("WEBHOOK_PORT", 8080)))
+    workers: int = int(os.getenv("WORKERS", 1))
+    leaderboard_max_age: float = float(os.getenv("LEADERBOARD_MAX_AGE", 0))
+    # Prometheus text endpoint at /metrics (0 = off); webhook worker i listens on METRICS_PORT + i
+    metrics_port: int = int(os.getenv("METRICS_PORT", 0))
+    metrics_host: str = os.getenv("METRICS_HOST", "0.0.0.0")
 
     database_url: str | None = os.getenv("DATABASE_URL", None)
+    db_pool_size: int = int(os.getenv("DB_POOL_SIZE", 10))
+    db_max_overflow: int = int(os.getenv("DB_MAX_OVERFLOW", 10))
+    # Apply pending Alembic migrations at startup; false = refuse to start until `alembic upgrade head`
+    db_auto_migrate: bool = os.getenv("DB_AUTO_MIGRATE", "true").lower() == "true"
 
     # Solana
     treasury_private_key: str | None = os.getenv("TREASURY_PRIVATE_KEY", None)
@@ -0,0 +1,122 @@
+"""Webhook front end that shards updates by chat across worker processes.
+
+    WEBHOOK_URL=https://example.com/tg WORKERS=4 ROUND_STORE=sqlite:data/rounds.sqlite3 python -m src.webhook
+
+Every update for a given chat goes to worker ``chat_id % WORKERS``, so a
+chat's rounds, deadlines and answers are always handled by the same process
+and the per-process caches stay coherent for it. A shared ROUND_STORE lets a
+restarted worker pick up questions that were open when it went down.
+"""
+import asyncio, logging, multiprocessing as mp
+from urllib.parse import urlparse
+import orjson
+from aiohttp import web
+from aiogram import Bot
+
+from .utils.config import settings
+
+log = logging.getLogger(__name__)
+
+_CHAT_KEYS = ("message", "edited_message", "channel_post", "edited_channel_post",
+              "my_chat_member", "chat_member", "chat_join_request")
+_USER_KEYS = ("inline_query", "chosen_inline_result", "shipping_query", "pre_checkout_query")
+
+def chat_of(update: dict) -> int:
+    """Chat an update belongs to (the sender for chat-less updates, 0 if neither)."""
+    for key in _CHAT_KEYS:
+        if obj := update.get(key):
+            return obj["chat"]["id"]
+    if cq := update.get("callback_query"):
+        if msg := cq.get("message"):
+            return msg["chat"]["id"]
+        return cq["from"]["id"]
+    for key in _USER_KEYS:
+        if obj := update.get(key):
+            return obj["from"]["id"]
+    if pa := update.get("poll_answer"):
+        return (pa.get("user") or {}).get("id", 0)
+    return 0
+
+def shard_for(update: dict, workers: int) -> int:
+    return chat_of(update) % workers
+
+def _worker(index: int, queue):
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_worker_main(index, queue))
+
+async def _worker_main(index: int, queue):
+    from . import bot as app
+
+    if settings.workers > 1 and not settings.leaderboard_max_age:
+        app.LEADERBOARDS.max_age = 5.0  # other workers' reveals land in scores, not in our board
+    if app.JOURNAL and settings.workers > 1:
+        app.JOURNAL.path = f"{app.JOURNAL.path}.{index}"  # chats stay on one worker, so does their journal
+    if settings.workers > 1:
+        app.AUTOROUNDS.owns = lambda chat_id: chat_id % settings.workers == index  # same split as shard_for
+        # Telegram's global limit is per bot: each worker gets its share
+        app.OUTBOX.set_global_rate(settings.outbox_global_per_sec / settings.workers)
+    bot = Bot(settings.bot_token)
+    dp = app.build_dispatcher()
+    tasks = await app.on_startup(bot, run_scheduler=(index == 0),
+                                 metrics_port=settings.metrics_port + index if settings.metrics_port else 0)
+    handling: set[asyncio.Task] = set()
+    loop = asyncio.get_running_loop()
+    try:
+        while True:
+            raw = await loop.run_in_executor(None, queue.get)
+            if raw is None:
+                break
+            t = asyncio.create_task(dp.feed_raw_update(bot, orjson.loads(raw)))
+            handling.add(t)
+            t.add_done_callback(handling.discard)
+    finally:
+        await app.on_shutdown(tasks)
+        await bot.session.close()
+
+def main():
+    from .bot import ensure_db, build_dispatcher
+
+    logging.basicConfig(level=logging.INFO)
+    if not settings.webhook_url:
+        raise SystemExit("WEBHOOK_URL is required for webhook mode")
+    ensure_db()
+    # chat_member updates aren't sent unless asked for; the admin cache needs them
+    allowed_updates = build_dispatcher().resolve_used_update_types()
+    n = max(1, settings.workers)
+    ctx = mp.get_context("spawn")
+    queues = [ctx.Queue() for _ in range(n)]
+    procs = [ctx.Process(target=_worker, args=(i, q), name=f"trivia-worker-{i}", daemon=True)
+             for i, q in enumerate(queues)]
+    for p in procs:
+        p.start()
+
+    async def handle(request: web.Request) -> web.Response:
+        if settings.webhook_secret and request.headers.get("X-Telegram-Bot-Api-Secret-Token") != settings.webhook_secret:
+            return web.Response(status=401)
+        raw = await request.read()
+        try:
+            update = orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            return web.Response(status=400)
+        queues[shard_for(update, n)].put(raw)
+        return web.Response()
+
+    async def register(_app):
+        async with Bot(settings.bot_token) as bot:
+            await bot.set_webhook(settings.webhook_url, secret_token=settings.webhook_secret or None,
+                                  allowed_updates=allowed_updates)
+        log.info("webhook set to %s, %d worker(s)", settings.webhook_url, n)
+
+    app = web.Application()
+    app.router.add_post(urlparse(settings.webhook_url).path or "/", handle)
+    app.on_startup.append(register)
+    try:
+        web.run_app(app, host=settings.webhook_host, port=settings.webhook_port)
+    finally:
+        for q in queues:
+            q.put(None)
+        for p in procs:
+            p.join(timeout=10)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import asyncio, os, tempfile
+
+# Settings are read at import time: point everything at a throwaway database first.
+_tmp = tempfile.mkdtemp(prefix="trivia-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_tmp, 'test.sqlite3')}"
+os.environ.setdefault("BOT_TOKEN", "123456:test")
+os.environ["ANSWER_JOURNAL"] = ""
+
+import pytest
+from sqlalchemy import delete
+
+from src.db import Base, SessionLocal, async_engine, ensure_schema
+from src import models  # noqa: F401
+
+@pytest.fixture(scope="session")
+def schema():
+    ensure_schema()
+
+@pytest.fixture
+def db(schema):
+    """Empty tables; yields a sync session."""
+    with SessionLocal() as s:
+        for table in reversed(Base.metadata.sorted_tables):
+            s.execute(delete(table))
+        s.commit()
+        yield s
+
+@pytest.fixture
+def arun():
+    """Run a coroutine on a fresh loop, then drop pooled async connections tied to it."""
+    def run(coro):
+        async def main():
+            try:
+                return await coro
+            finally:
+                await async_engine.dispose()
+        return asyncio.run(main())
+    return run
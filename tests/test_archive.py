@@ -0,0 +1,39 @@
+import os
+from sqlalchemy import func, select
+
+from src.archive import archive_weeks
+from src.models import Score, ScoreArchive, StatRollup, User
+from src.rollups import ALL_TIME, apply_rollup_deltas
+from src.scheduler import _weekly_csv_path
+
+WEEK = "2026-W03"
+
+def _played(db):
+    u = User(tg_id=3001, username="r")
+    db.add(u)
+    db.flush()
+    db.add(Score(user_id=u.id, week_key=WEEK, points=15, correct=1, wrong=0, streak=1))
+    apply_rollup_deltas(db, -1, WEEK, {u.id: (15, 1, 0, 1)}, month="2026-01")
+    db.commit()
+    return u
+
+def _rollups(db, period):
+    return db.scalar(select(func.count()).select_from(StatRollup).where(StatRollup.period == period))
+
+def test_archiving_a_closed_week_keeps_its_rollups(db):
+    _played(db)
+    assert archive_weeks(db, [WEEK]) == 1
+    assert db.scalar(select(ScoreArchive.points)) == 15
+    assert _rollups(db, WEEK) == 1
+
+def test_reset_drops_the_weeks_rollups_only(db):
+    _played(db)
+    assert archive_weeks(db, [WEEK], drop_rollups=True) == 1
+    assert db.scalar(select(func.count()).select_from(Score)) == 0
+    assert _rollups(db, WEEK) == 0
+    assert _rollups(db, "2026-01") == 2 and _rollups(db, ALL_TIME) == 2
+
+def test_reset_snapshot_has_its_own_file():
+    week, snapshot = _weekly_csv_path(WEEK), _weekly_csv_path(WEEK, "reset-20260115T120000Z")
+    assert os.path.basename(week) == f"leaderboard_{WEEK}.csv"
+    assert os.path.basename(snapshot) == f"leaderboard_{WEEK}_reset-20260115T120000Z.csv"
@@ -0,0 +1,110 @@
+from datetime import datetime, timedelta, timezone
+
+from src.autorounds import AutoRounds, RoundGate
+
+def make_gate(depth: int = 0, **kw) -> RoundGate:
+    kw = {"max_active": 16, "min_active": 2, "outbox_target": 100, "finalize_target": 2.0,
+          "outbox_depth": lambda: depth, "adjust_every": 5.0, **kw}
+    return RoundGate(**kw)
+
+def test_slow_reveal_fades_out(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("src.autorounds.time.monotonic", lambda: clock[0])
+    gate = make_gate(finalize_half_life=30.0)
+    gate.observe_finalize(45.0)  # one very late reveal
+    assert gate.finalize_ewma == 9.0
+    clock[0] += 90  # three half-lives without a reveal
+    gate._adjust(clock[0])
+    assert gate.finalize_ewma == 9.0 / 8
+    clock[0] += 30
+    gate._adjust(clock[0])
+    assert gate.finalize_ewma < gate.finalize_target
+
+def test_cap_halves_under_load_and_grows_back_one_at_a_time(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("src.autorounds.time.monotonic", lambda: clock[0])
+    depth = [0]
+    gate = make_gate(outbox_depth=lambda: depth[0])
+
+    def tick():
+        clock[0] += gate.adjust_every
+        gate.try_acquire() and gate.release()
+        return gate.cap
+
+    depth[0] = 500  # outbox backlog over target
+    assert [tick() for _ in range(5)] == [8, 4, 2, 2, 2]  # halves, never below min_active
+    assert gate.shrinks == 3
+    depth[0] = 0
+    assert [tick() for _ in range(3)] == [3, 4, 5]
+    gate.observe_finalize(30.0)  # slow reveals shrink it too
+    assert tick() == 2
+    clock[0] += 3600
+    assert tick() == 3  # the latency has faded: regrowth resumes
+
+def test_cap_is_only_reconsidered_every_adjust_interval(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr("src.autorounds.time.monotonic", lambda: clock[0])
+    depth = [500]
+    gate = make_gate(outbox_depth=lambda: depth[0])
+    for _ in range(4):
+        assert gate.try_acquire()  # first call adjusts (16 -> 8); the rest are within the interval
+    assert gate.cap == 8 and gate.active == 4
+
+def test_full_gate_refuses_scheduled_rounds_but_not_manual_ones(monkeypatch, arun):
+    monkeypatch.setattr("src.autorounds.random.uniform", lambda a, b: 0.01)
+    gate = make_gate(max_active=2)
+    assert arun(gate.acquire(timeout=1)) and arun(gate.acquire(timeout=1))
+    assert not arun(gate.acquire(timeout=0.05))
+    assert (gate.started, gate.skipped) == (2, 1)
+    gate.claim()  # /quiz
+    assert gate.active == 3
+    gate.release()
+    assert gate.try_acquire() is False
+
+class FakeScheduler:
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, func, trigger, args, id, **kw):
+        self.jobs[id] = (trigger, args, kw)
+
+    def remove_job(self, job_id):
+        del self.jobs[job_id]
+
+def test_apply_spreads_first_runs_and_bounds_jitter():
+    rounds = AutoRounds(make_gate(), run_round=None, jitter=60.0)
+    rounds._sched = sched = FakeScheduler()
+    now = datetime.now(timezone.utc)
+    for chat_id in range(-50, 0):
+        rounds.apply(chat_id, 10, 5)
+    rounds.apply(-99, 2, 3)  # short interval: jitter limited to a quarter of it
+    firsts = []
+    for job_id, (trigger, args, kw) in sched.jobs.items():
+        period = 600 if job_id != "round:-99" else 120
+        assert trigger.interval.total_seconds() == period
+        assert trigger.jitter == min(60.0, period / 4)
+        assert kw["misfire_grace_time"] == period // 2 and kw["max_instances"] == 1
+        assert now <= trigger.start_date <= now + timedelta(seconds=period + 1)
+        firsts.append(trigger.start_date)
+    assert len(set(firsts)) == len(firsts)  # not all on the same minute
+    assert rounds.get(-99) == (2, 3)
+    rounds.apply(-99, None)
+    assert "round:-99" not in sched.jobs and rounds.get(-99) is None
+    assert len(rounds) == 50
+
+def test_scheduled_run_waits_at_most_half_its_interval(arun):
+    waited = []
+
+    class Gate:
+        async def acquire(self, timeout):
+            waited.append(timeout)
+            return False
+
+        def stats(self):
+            return ""
+
+    ran = []
+    rounds = AutoRounds(Gate(), run_round=lambda chat_id, n: ran.append(chat_id))
+    rounds._jobs[-1] = (10, 5)
+    arun(rounds._run(-1, 5))
+    assert waited == [300] and ran == []  # 10 minutes: skipped after 5
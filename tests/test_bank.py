@@ -0,0 +1,94 @@
+import asyncio, time
+import orjson
+import pytest
+from aiohttp import web
+
+from src.questions import import_questions
+from src.trivia import QuestionBank
+
+def _opentdb_item(i: int) -> dict:
+    return {"question": f"Who &amp; {i}?", "correct_answer": f"right{i}",
+            "incorrect_answers": [f"w{i}a", f"w{i}b", f"w{i}c"]}
+
+class StubOpenTDB:
+    """Local stand-in for opentdb.com/api.php that records every call."""
+
+    def __init__(self):
+        self.calls: list[tuple[float, dict]] = []
+        self.served = 0
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.calls.append((time.monotonic(), dict(request.query)))
+        n = int(request.query["amount"])
+        items = [_opentdb_item(self.served + i) for i in range(n)]
+        self.served += n
+        return web.json_response({"response_code": 0, "results": items})
+
+    async def __aenter__(self) -> str:
+        app = web.Application()
+        app.router.add_get("/api.php", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        return f"http://{host}:{port}/api.php"
+
+    async def __aexit__(self, *exc):
+        await self._runner.cleanup()
+
+def test_remote_buffer_is_refilled_in_the_background(db, arun, tmp_path):
+    stub = StubOpenTDB()
+
+    async def go():
+        async with stub as url:
+            bank = QuestionBank(path=str(tmp_path / "none.json"), api_url=url, buffer_size=10, min_interval=0.2)
+            bank.start()
+            try:
+                first = await bank.sample(3)  # cold: nothing buffered yet, fetched directly
+                assert [q["prompt"] for q in first] == ["Who & 0?", "Who & 1?", "Who & 2?"]
+                assert all(q["options"][q["correct_opt"]] == f"right{i}" for i, q in enumerate(first))
+                while len(bank._buffer) < 10:
+                    await asyncio.sleep(0.05)
+                calls = len(stub.calls)
+                again = await bank.sample(4)  # straight from the buffer
+                assert [q["prompt"] for q in again] == [f"Who & {i}?" for i in range(3, 7)]
+                assert len(stub.calls) == calls
+                while len(bank._buffer) < 10:
+                    await asyncio.sleep(0.05)
+            finally:
+                await bank.close()
+
+    arun(go())
+    assert [c[1] for c in stub.calls] == [
+        {"amount": "3", "category": "12", "type": "multiple"},
+        {"amount": "10", "category": "12", "type": "multiple"},
+        {"amount": "4", "category": "12", "type": "multiple"},
+    ]
+    gaps = [b[0] - a[0] for a, b in zip(stub.calls, stub.calls[1:])]
+    assert min(gaps) >= 0.2  # min_interval between upstream calls
+
+@pytest.mark.parametrize("source", ["file", "table"])
+def test_local_sources_never_call_upstream(source, db, arun, tmp_path):
+    path = tmp_path / "questions.json"
+    record = {"prompt": "Local?", "opt_a": "1", "opt_b": "2", "opt_c": "3", "opt_d": "4", "correct_opt": "b"}
+    if source == "file":
+        path.write_bytes(orjson.dumps([record]))
+    else:
+        import_questions(db, [record])
+    stub = StubOpenTDB()
+
+    async def go():
+        async with stub as url:
+            bank = QuestionBank(path=str(path), api_url=url, buffer_size=10, min_interval=0)
+            bank.start()
+            try:
+                qs = await bank.sample(1)
+                await asyncio.sleep(0.1)  # give the refill loop its chance to (wrongly) fetch
+                return qs
+            finally:
+                await bank.close()
+
+    qs = arun(go())
+    assert [(q["prompt"], q["correct_opt"]) for q in qs] == [("Local?", "B")]
+    assert stub.calls == []
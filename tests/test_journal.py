@@ -0,0 +1,117 @@
+import asyncio, os
+import orjson
+
+from src import journal as journal_mod
+from src.journal import AnswerJournal
+
+def lines(path) -> list[list]:
+    with open(path, "rb") as f:
+        return [orjson.loads(line) for line in f]
+
+def write(path, *records, tail: bytes = b""):
+    with open(path, "wb") as f:
+        f.write(b"".join(orjson.dumps(r) + b"\n" for r in records) + tail)
+
+def test_replay_keeps_unsettled_questions_and_skips_a_torn_line(tmp_path):
+    path = tmp_path / "answers.journal"
+    write(path,
+          ["q", -1, "A", 100.0, "t1"], ["a", -1, 7, "A", 91.0], ["a", -1, 7, "B", 92.0],  # first answer wins
+          ["q", -2, "C", 200.0],  # written before tags were journaled
+          ["q", -3, "D", 300.0, "t3"], ["a", -3, 8, "D", 290.0], ["s", -3],
+          ["a", -4, 9, "A", 1.0],  # answer without its question
+          tail=b'["a", -1, 8, "A", 95')  # crash mid-write
+    rounds = AnswerJournal(str(path)).replay()
+    assert rounds == {
+        -1: {"correct": "A", "deadline": 100.0, "tag": "t1", "answers": {7: ("A", 91.0)}},
+        -2: {"correct": "C", "deadline": 200.0, "tag": None, "answers": {}},
+    }
+
+def test_start_rewrites_the_file_with_only_unsettled_records(tmp_path, arun):
+    path = tmp_path / "answers.journal"
+    write(path, ["q", -1, "A", 100.0, "t1"], ["a", -1, 7, "A", 91.0], ["q", -3, "D", 300.0, "t3"], ["s", -3],
+          tail=b'["q", -5')
+    j = AnswerJournal(str(path))
+    j.replay()
+
+    async def go():
+        j.start()
+        assert lines(path) == [["q", -1, "A", 100.0, "t1"], ["a", -1, 7, "A", 91.0]]
+        j.question(-2, "B", 400.0, "t2")
+        await j.answer(-2, 9, "B", 390.0)
+        await j.close()
+
+    arun(go())
+    assert lines(path)[-2:] == [["q", -2, "B", 400.0, "t2"], ["a", -2, 9, "B", 390.0]]
+
+def test_answers_are_acked_after_fsync_in_one_batch(tmp_path, arun, monkeypatch):
+    events = []
+    real_fsync = os.fsync
+
+    def fsync(fd):
+        real_fsync(fd)
+        events.append("fsync")
+
+    monkeypatch.setattr(journal_mod.os, "fsync", fsync)
+    j = AnswerJournal(str(tmp_path / "answers.journal"))
+    j.replay()
+
+    async def go():
+        j.start()
+        j.question(-1, "A", 100.0, "t")
+        await asyncio.sleep(0.05)
+        events.clear()  # the compaction on start and the question's own batch
+
+        async def answer(tg_id):
+            await j.answer(-1, tg_id, "A", 90.0)
+            events.append(f"ack {tg_id}")
+
+        await asyncio.gather(*(answer(i) for i in range(3)))
+        seen = list(events)
+        on_disk = lines(j.path)
+        await j.close()
+        return seen, on_disk
+
+    seen, on_disk = arun(go())
+    assert seen == ["fsync", "ack 0", "ack 1", "ack 2"]  # group commit: one fsync, then every ack
+    assert len(on_disk) == 4
+    assert j.batches == 2 and j.records == 4
+
+def test_compacts_past_the_size_threshold(tmp_path, arun):
+    path = tmp_path / "answers.journal"
+    j = AnswerJournal(str(path), compact_bytes=400)
+    j.replay()
+
+    async def go():
+        j.start()
+        for chat_id in range(-20, 0):
+            j.question(chat_id, "A", 100.0, "t")
+            await j.answer(chat_id, 7, "A", 90.0)
+            if chat_id != -1:
+                j.settled(chat_id)
+        await j.answer(-1, 8, "B", 91.0)
+        size = os.path.getsize(path)
+        await j.close()
+        return size
+
+    size = arun(go())
+    assert j.compactions >= 1
+    assert size < 400
+    assert AnswerJournal(str(path)).replay() == {
+        -1: {"correct": "A", "deadline": 100.0, "tag": "t", "answers": {7: ("A", 90.0), 8: ("B", 91.0)}}}
+
+def test_close_flushes_pending_records_and_compacts(tmp_path, arun):
+    path = tmp_path / "answers.journal"
+    j = AnswerJournal(str(path))
+    j.replay()
+
+    async def go():
+        j.start()
+        j.question(-1, "A", 100.0, "t1")
+        j.question(-2, "B", 100.0, "t2")
+        await j.answer(-2, 7, "B", 90.0)
+        j.settled(-2)
+        j.question(-3, "C", 100.0, "t3")  # still pending when close() runs
+        await j.close()
+
+    arun(go())
+    assert lines(path) == [["q", -1, "A", 100.0, "t1"], ["q", -3, "C", 100.0, "t3"]]
@@ -0,0 +1,120 @@
+import asyncio, time
+from aiogram import Bot
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bench.fake_api import FakeSession
+from src.outbox import Outbox
+
+class ChatSession(FakeSession):
+    """Keeps (time, chat, text) of every delivered message.
+
+    ``faults`` maps a text to the exceptions its first sends raise, in order.
+    """
+
+    def __init__(self, faults: dict[str, list] | None = None):
+        super().__init__()
+        self.sent: list[tuple[float, int, str]] = []
+        self.faults = faults or {}
+        self.t0 = time.monotonic()
+
+    async def respond(self, method):
+        assert isinstance(method, SendMessage)
+        if self.faults.get(method.text):
+            raise self.faults[method.text].pop(0)(method)
+        self.sent.append((time.monotonic() - self.t0, method.chat_id, method.text))
+        return await super().respond(method)
+
+def retry_after(seconds: int):
+    return lambda method: TelegramRetryAfter(method, "Too Many Requests", retry_after=seconds)
+
+def network_down(method):
+    return TelegramNetworkError(method, "connection reset")
+
+def make_outbox(**kw) -> Outbox:
+    kw = {"global_per_sec": 1000, "private_per_sec": 1000, "group_per_min": 60_000, "ack_saturation": 5, **kw}
+    return Outbox(**kw)
+
+def drain(outbox: Outbox, session: ChatSession, queue, until: int):
+    """Start the outbox, queue messages via ``queue(outbox)``, and wait for ``until`` deliveries."""
+    async def go():
+        outbox.start(Bot("123456:test", session=session))
+        session.t0 = time.monotonic()
+        futures = queue(outbox)
+        try:
+            for _ in range(300):
+                if len(session.sent) >= until and outbox.depth() == 0:
+                    break
+                await asyncio.sleep(0.01)
+            await asyncio.sleep(0.05)
+            return [None if f is None else (f.exception() or f.result()) if f.done() else "pending"
+                    for f in futures]
+        finally:
+            await outbox.close()
+    return asyncio.run(go())
+
+def texts(session: ChatSession, chat_id: int) -> list[str]:
+    return [text for _, c, text in session.sent if c == chat_id]
+
+def test_per_chat_order_and_global_pacing():
+    session = ChatSession()
+    outbox = make_outbox(global_per_sec=100)
+    drain(outbox, session, lambda o: [o.send(c, f"{c}:{i}") for i in range(50) for c in (1, 2, 3)], 150)
+    for c in (1, 2, 3):
+        assert texts(session, c) == [f"{c}:{i}" for i in range(50)]
+    # a burst of 100, then 100/s for the other 50
+    assert session.sent[-1][0] >= 0.4
+    assert outbox.sent == 150
+
+def test_per_chat_pacing_leaves_other_chats_alone():
+    session = ChatSession()
+    outbox = make_outbox(private_per_sec=10)
+    drain(outbox, session, lambda o: [o.send(7, f"dm{i}") for i in range(4)] + [o.send(8, "other")], 5)
+    dm_times = [t for t, c, _ in session.sent if c == 7]
+    assert dm_times[-1] - dm_times[0] >= 0.28  # burst 1, then one every 0.1s
+    other = next(t for t, c, _ in session.sent if c == 8)
+    assert other < dm_times[-1]
+
+def test_429_requeues_at_the_head_and_blocks_only_that_chat():
+    session = ChatSession(faults={"a1": [retry_after(1)]})
+    outbox = make_outbox()
+    results = drain(outbox, session, lambda o: [o.send(-1, "a1"), o.send(-1, "a2"), o.send(-2, "b1")], 3)
+    assert texts(session, -1) == ["a1", "a2"]
+    a1 = next(t for t, _, text in session.sent if text == "a1")
+    b1 = next(t for t, _, text in session.sent if text == "b1")
+    assert a1 >= 1.0 and b1 < 0.5
+    assert outbox.retried == 1
+    assert [m.text for m in results] == ["a1", "a2", "b1"]
+
+def test_network_errors_are_retried_then_given_up():
+    session = ChatSession(faults={"flaky": [network_down], "dead": [network_down] * 3})
+    outbox = make_outbox()
+    results = drain(outbox, session, lambda o: [o.send(5, "flaky"), o.send(6, "dead"), o.send(6, "after")], 2)
+    assert sorted(text for _, _, text in session.sent) == ["after", "flaky"]
+    assert results[0].text == "flaky"
+    assert isinstance(results[1], TelegramNetworkError)
+    assert outbox.dropped == 1
+
+def test_acks_coalesce_per_kind():
+    session = ChatSession()
+    outbox = make_outbox(ack_saturation=3)
+
+    def queue(o):
+        futures = [o.send(9, "question")]
+        futures += [o.send(9, "locked", ack="locked", ack_many="{n} locked") for _ in range(4)]
+        futures += [o.send(9, "late", ack="late") for _ in range(2)]  # no ack_many: sent as is
+        futures.append(o.send(9, "reveal"))
+        return futures
+
+    results = drain(outbox, session, queue, 4)
+    assert texts(session, 9) == ["question", "4 locked", "late", "reveal"]
+    # only the first of each kind gets a future; the rest just bumped its count
+    assert [r is None for r in results] == [False, False, True, True, True, False, True, False]
+    assert outbox.coalesced == 4 and outbox.dropped == 0
+
+def test_ack_dropped_when_chat_backlog_is_full():
+    session = ChatSession()
+    outbox = make_outbox(ack_saturation=2)
+    results = drain(outbox, session, lambda o: [o.send(4, "q1"), o.send(4, "q2"), o.send(4, "ok", ack="locked")], 2)
+    assert texts(session, 4) == ["q1", "q2"]
+    assert results[2] is None and outbox.dropped == 1
@@ -0,0 +1,107 @@
+import asyncio, threading, time
+import pytest
+from sqlalchemy import select
+
+from src.models import Payout, Score, User, Wallet
+from src.payouts import run_payouts
+from src.solana_payouts import TransferNotSent
+
+WEEK = "2026-W01"
+
+class FakeRPC:
+    """Stands in for PayoutClient: records every transfer.
+
+    Wallets in ``fail`` are refused once before broadcast; for wallets in
+    ``lose`` the transfer goes out but the call times out.
+    """
+
+    def __init__(self, delay: float = 0.05, fail: tuple[str, ...] = (), lose: tuple[str, ...] = ()):
+        self.delay = delay
+        self.fail = set(fail)
+        self.lose = set(lose)
+        self.transfers: list[tuple[str, int]] = []
+        self._lock = threading.Lock()
+
+    def transfer_spl(self, mint, treasury_key, to_wallet, amount, dry_run=True):
+        time.sleep(self.delay)
+        with self._lock:
+            if to_wallet in self.fail:
+                self.fail.discard(to_wallet)
+                raise TransferNotSent("simulation failed")
+            self.transfers.append((to_wallet, amount))
+            if to_wallet in self.lose:
+                raise TimeoutError("rpc timed out")
+        return f"SIG_{to_wallet}"
+
+@pytest.fixture
+def winners(db):
+    for i, points in enumerate((50, 30, 20), start=1):
+        u = User(tg_id=1000 + i, username=f"p{i}")
+        db.add(u)
+        db.flush()
+        db.add_all([Score(user_id=u.id, week_key=WEEK, points=points, correct=1, wrong=0, streak=0),
+                    Wallet(user_id=u.id, address=f"WALLET{i}", verified=False)])
+    db.commit()
+    return db
+
+def _statuses(db):
+    db.expire_all()
+    return sorted(db.scalars(select(Payout.status)))
+
+def test_rerun_pays_only_what_is_left(winners, arun):
+    rpc = FakeRPC(fail=("WALLET2",))
+    arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+    assert sorted(w for w, _ in rpc.transfers) == ["WALLET1", "WALLET3"]
+    assert _statuses(winners) == ["failed", "sent", "sent"]
+
+    lines = arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+    assert sorted(w for w, _ in rpc.transfers) == ["WALLET1", "WALLET2", "WALLET3"]
+    assert _statuses(winners) == ["sent", "sent", "sent"]
+    assert sum("already paid" in line for line in lines) == 2
+
+    arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+    assert len(rpc.transfers) == 3
+
+def test_concurrent_runs_pay_each_winner_once(winners, arun):
+    rpc = FakeRPC(delay=0.2)
+
+    async def both():
+        return await asyncio.gather(*(run_payouts(WEEK, rpc, winners=3, dry_run=False) for _ in range(2)))
+
+    arun(both())
+    assert sorted(w for w, _ in rpc.transfers) == ["WALLET1", "WALLET2", "WALLET3"]
+    assert _statuses(winners) == ["sent", "sent", "sent"]
+    assert [a for _, a in sorted(rpc.transfers)] == [500_000, 300_000, 200_000]
+
+def test_rerun_keeps_the_first_runs_recipients(winners, arun):
+    rpc = FakeRPC(fail=("WALLET2",))
+    arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+
+    # standings move between runs: a fourth player passes WALLET3
+    u = User(tg_id=1004, username="p4")
+    winners.add(u)
+    winners.flush()
+    winners.add_all([Score(user_id=u.id, week_key=WEEK, points=40, correct=1, wrong=0, streak=0),
+                     Wallet(user_id=u.id, address="WALLET4", verified=False)])
+    winners.commit()
+
+    lines = arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+    assert sorted(rpc.transfers) == [("WALLET1", 500_000), ("WALLET2", 300_000), ("WALLET3", 200_000)]
+    assert sum(a for _, a in rpc.transfers) <= 1_000_000
+    assert _statuses(winners) == ["sent", "sent", "sent"]
+    assert any("current standings are ignored" in line for line in lines)
+
+def test_rows_over_the_pool_are_not_paid(winners, arun):
+    arun(run_payouts(WEEK, FakeRPC(delay=0), winners=3, dry_run=True))
+    lines = arun(run_payouts(WEEK, FakeRPC(delay=0), winners=3, pool=500_000, dry_run=False))
+    assert "STOPPED" in lines[-1]
+    assert _statuses(winners) == ["dry_run", "dry_run", "dry_run"]
+
+def test_ambiguous_failure_is_never_resent(winners, arun):
+    rpc = FakeRPC(delay=0, lose=("WALLET2",))
+    arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+    assert _statuses(winners) == ["sent", "sent", "unknown"]
+
+    lines = arun(run_payouts(WEEK, rpc, winners=3, dry_run=False))
+    assert sorted(w for w, _ in rpc.transfers) == ["WALLET1", "WALLET2", "WALLET3"]
+    assert any("UNKNOWN" in line and "300000" in line for line in lines)
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import delete, select
+
+from src.models import Question
+from src.questions import import_questions, sample_questions
+from src.seen import next_unseen, to_bits
+
+def test_next_unseen():
+    assert next_unseen(0, 0) == 0
+    assert next_unseen(0b1011, 0) == 2
+    assert next_unseen(0b1011, 2) == 2
+    assert next_unseen(0b1011, 3) == 4
+    assert next_unseen(to_bits(range(5, 200)), 5) == 200
+
+def _record(i: int, category: str = "Music") -> dict:
+    return {"prompt": f"Q{i}", "opt_a": f"a{i}", "opt_b": f"b{i}", "opt_c": f"c{i}", "opt_d": f"d{i}",
+            "correct_opt": "a", "category": category}
+
+@pytest.fixture
+def pool(db):
+    """Ids of 20 Music questions, then 5 Film ones."""
+    import_questions(db, [_record(i) for i in range(20)] + [_record(i, "Film") for i in range(20, 25)])
+    return db, db.scalars(select(Question.id).order_by(Question.id)).all()
+
+def test_sample_is_distinct_and_in_category(pool):
+    db, ids = pool
+    picked = sample_questions(db, 10, "Music")
+    assert len(picked) == len({q["id"] for q in picked}) == 10
+    assert all(q["category"] == "Music" for q in picked)
+    assert len(sample_questions(db, 50, "Film")) == 5
+
+def test_sample_skips_seen_ids(pool):
+    db, ids = pool
+    music = ids[:20]
+    fresh = {music[3], music[11], music[19]}
+    seen = to_bits(set(music) - fresh)
+    for _ in range(20):
+        assert {q["id"] for q in sample_questions(db, 5, "Music", seen=seen)} == fresh
+
+def test_sample_wraps_around_to_low_ids(pool):
+    db, ids = pool
+    music = ids[:20]
+    seen = to_bits(music[1:])  # only the lowest id is left: every draw above it has to wrap
+    for _ in range(20):
+        assert [q["id"] for q in sample_questions(db, 3, "Music", seen=seen)] == [music[0]]
+    assert sample_questions(db, 3, "Music", seen=to_bits(music)) == []
+
+def test_sample_steps_over_gaps(pool):
+    db, ids = pool
+    music = ids[:20]
+    db.execute(delete(Question).where(Question.id.in_(music[5:15])))
+    db.commit()
+    picked = {q["id"] for q in sample_questions(db, 10, "Music")}
+    assert picked == set(music[:5] + music[15:])
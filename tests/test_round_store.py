@@ -0,0 +1,86 @@
+import asyncio, sqlite3, time
+import pytest
+
+from src.round_store import MemoryRoundStore, RoundStore, SqliteRoundStore, make_round_store
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return MemoryRoundStore()
+    return SqliteRoundStore(str(tmp_path / "rounds.sqlite3"))
+
+def run(store, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await store.close()
+    return asyncio.run(main())
+
+def test_base_is_abstract():
+    with pytest.raises(TypeError):
+        RoundStore()
+
+def test_make_round_store(tmp_path):
+    assert isinstance(make_round_store(""), MemoryRoundStore)
+    assert isinstance(make_round_store(f"sqlite:{tmp_path}/r.sqlite3"), SqliteRoundStore)
+    with pytest.raises(ValueError):
+        make_round_store("redis://localhost")
+
+def test_lock_expires_after_ttl(store):
+    async def go():
+        assert await store.try_lock(-1, ttl=60)
+        assert not await store.try_lock(-1, ttl=60)
+        assert await store.try_lock(-2, ttl=60)
+        await asyncio.sleep(0.05)
+        assert await store.try_lock(-1, ttl=0.01)  # abandoned
+        await store.unlock(-1)
+        assert await store.try_lock(-1, ttl=60)
+    run(store, go())
+
+def test_question_lifecycle(store):
+    async def go():
+        assert await store.get(-1) is None
+        assert not await store.add_answer(-1, 7, "A", 1.0)  # nothing open
+        deadline = time.time() + 30
+        await store.start_question(-1, "B", deadline, "111")
+        st = await store.get(-1)
+        assert (st["correct"], st["deadline"], st["tag"]) == ("B", deadline, "111")
+        assert await store.add_answer(-1, 7, "A", 1.0)
+        assert not await store.add_answer(-1, 7, "B", 2.0)  # first answer counts
+        assert await store.add_answer(-1, 8, "B", 3.0)
+        assert await store.active() == [(-1, deadline)]
+
+        await store.start_question(-1, "C", deadline + 30, "222")  # replaces the question and its answers
+        assert await store.add_answer(-1, 7, "C", 4.0)
+        st = await store.finish(-1)
+        assert (st["correct"], st["tag"], st["answers"]) == ("C", "222", {7: ("C", 4.0)})
+        assert await store.finish(-1) is None
+        assert await store.active() == []
+    run(store, go())
+
+def test_sqlite_is_shared_between_stores(tmp_path):
+    path = str(tmp_path / "rounds.sqlite3")
+    a, b = SqliteRoundStore(path), SqliteRoundStore(path)
+
+    async def go():
+        try:
+            await a.start_question(-1, "A", 123.0, "9")
+            assert await b.add_answer(-1, 7, "A", 1.0)
+            assert not await a.add_answer(-1, 7, "D", 2.0)
+            assert await a.try_lock(-1, ttl=60)
+            assert not await b.try_lock(-1, ttl=60)
+            assert (await b.finish(-1))["answers"] == {7: ("A", 1.0)}
+            assert await a.get(-1) is None
+        finally:
+            await a.close()
+            await b.close()
+    asyncio.run(go())
+
+def test_sqlite_file_without_tags_is_upgraded(tmp_path):
+    path = str(tmp_path / "rounds.sqlite3")
+    with sqlite3.connect(path) as conn:
+        conn.execute("CREATE TABLE rounds (chat_id INTEGER PRIMARY KEY, correct TEXT NOT NULL, deadline REAL NOT NULL)")
+        conn.execute("INSERT INTO rounds VALUES (-1, 'A', 123.0)")
+    store = SqliteRoundStore(path)
+    assert run(store, store.get(-1)) == {"correct": "A", "deadline": 123.0, "tag": None}
@@ -0,0 +1,45 @@
+import numpy as np
+
+from src.models import Score, User
+from src.scoring import BASE_POINTS, STREAK_STEP, TIME_BONUS_MAX, apply_score_deltas, score_answers
+
+OPENED, WINDOW = 1000.0, 20.0
+
+def score(choices: bytes, offsets, streaks, correct="A", cap=10):
+    return score_answers(np.frombuffer(choices, dtype=np.uint8), OPENED + np.asarray(offsets, dtype=float),
+                         np.asarray(streaks, dtype=np.int64), correct, OPENED, WINDOW, cap)
+
+def test_time_bonus_falls_over_the_window():
+    points, hit, _ = score(b"AAAAA", [0, WINDOW / 2, WINDOW, WINDOW + 5, -1], [0] * 5)
+    assert hit.all()
+    # full bonus at the open, half (2.5 rounds to even: 2) midway, none at or after the deadline;
+    # an answer stamped before the open counts as instant
+    assert points.tolist() == [BASE_POINTS + TIME_BONUS_MAX, BASE_POINTS + 2, BASE_POINTS, BASE_POINTS,
+                               BASE_POINTS + TIME_BONUS_MAX]
+
+def test_streak_bonus_is_capped():
+    points, _, streaks = score(b"AAAA", [WINDOW] * 4, [0, 1, 3, 50], cap=6)
+    assert points.tolist() == [BASE_POINTS, BASE_POINTS + STREAK_STEP, BASE_POINTS + 6, BASE_POINTS + 6]
+    assert streaks.tolist() == [1, 2, 4, 51]
+
+def test_wrong_answer_scores_nothing_and_resets_the_streak():
+    points, hit, streaks = score(b"ABCD", [0] * 4, [4, 4, 4, 0])
+    assert hit.tolist() == [True, False, False, False]
+    assert points.tolist() == [BASE_POINTS + TIME_BONUS_MAX + 8, 0, 0, 0]
+    assert streaks.tolist() == [5, 0, 0, 0]
+
+def test_no_answers():
+    points, hit, streaks = score(b"", [], [])
+    assert points.size == hit.size == streaks.size == 0
+
+def test_streak_is_extended_from_the_stored_row(db):
+    users = [User(tg_id=2000 + i, username=f"s{i}") for i in range(3)]
+    db.add_all(users)
+    db.flush()
+    a, b, c = (u.id for u in users)
+    db.add_all([Score(user_id=a, week_key="2026-W02", points=50, correct=5, wrong=0, streak=3),
+                Score(user_id=b, week_key="2026-W02", points=50, correct=5, wrong=0, streak=3)])
+    db.commit()
+    # the streaks passed in are stale (another reveal moved them on since they were read)
+    totals = apply_score_deltas(db, "2026-W02", {a: (12, 1, 0, 1), b: (0, 0, 1, 0), c: (15, 1, 0, 1)})
+    assert totals == {a: (62, 6, 0, 4), b: (50, 5, 1, 0), c: (15, 1, 0, 1)}
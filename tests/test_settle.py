@@ -0,0 +1,26 @@
+from sqlalchemy import select
+
+from src.models import Score, User
+from src.scoring import score_question
+
+WEEK = "2026-W01"
+
+def _points(db):
+    db.expire_all()
+    return sorted(db.scalars(select(Score.points)))
+
+def test_replayed_question_is_not_scored_twice(db):
+    db.add_all([User(tg_id=1), User(tg_id=2)])
+    db.commit()
+    answers = {1: ("A", 100.0), 2: ("B", 100.0)}
+    args = (WEEK, answers, "A", 100.0, 20.0, 10)
+
+    assert score_question(db, *args, chat_id=-5, deadline_ms=120_000) is not None
+    assert _points(db) == [0, 15]
+    # the journal replays the same question after a crash that followed the commit
+    assert score_question(db, *args, chat_id=-5, deadline_ms=120_000) is None
+    assert _points(db) == [0, 15]
+    # the chat's next question scores as usual; other chats are independent
+    assert score_question(db, *args, chat_id=-5, deadline_ms=150_000) is not None
+    assert score_question(db, *args, chat_id=-6, deadline_ms=120_000) is not None
+    assert _points(db) == [0, 15 + 17 + 19]  # streak bonus +2 per question
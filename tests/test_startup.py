@@ -0,0 +1,18 @@
+import logging
+
+import src.scheduler
+from src import bot as app
+
+def test_warm_up_failure_is_logged_and_later_steps_run(monkeypatch, arun, caplog, schema):
+    async def broken_start(sched):
+        raise RuntimeError("round_schedules unreadable")
+
+    started = []
+    monkeypatch.setattr(src.scheduler, "schedule_jobs", lambda bot, weekly: None)
+    monkeypatch.setattr(app.AUTOROUNDS, "start", broken_start)
+    monkeypatch.setattr(app.BANK, "start", lambda: started.append("bank"))
+    with caplog.at_level(logging.ERROR, logger="src.bot"):
+        arun(app._warm_up(bot=None, run_scheduler=False))
+    assert started == ["bank"]
+    assert [r.getMessage() for r in caplog.records] == ["startup step scheduler failed"]
+    assert "round_schedules unreadable" in caplog.text
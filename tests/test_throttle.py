@@ -0,0 +1,55 @@
+import asyncio
+from datetime import datetime, timezone
+from aiogram import Bot
+from aiogram.methods import AnswerCallbackQuery
+from aiogram.types import CallbackQuery, Chat, Message, User
+
+from bench.fake_api import FakeSession
+from src.throttle import ThrottleMiddleware, parse_limits
+
+PLAYER = User(id=7, is_bot=False, first_name="p")
+GROUP = Chat(id=-100, type="supergroup")
+
+def _tap(bot: Bot, n: int) -> CallbackQuery:
+    msg = Message(message_id=1, date=datetime.now(timezone.utc), chat=GROUP, text="question")
+    return CallbackQuery(id=str(n), from_user=PLAYER, chat_instance="ci", data="ans:1:A",
+                         message=msg).as_(bot)
+
+def _command(text: str) -> Message:
+    return Message(message_id=1, date=datetime.now(timezone.utc), chat=GROUP, from_user=PLAYER, text=text)
+
+def run(throttle: ThrottleMiddleware, events) -> list:
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event)
+
+    async def go():
+        for e in events:
+            await throttle(handler, e, {})
+
+    asyncio.run(go())
+    return handled
+
+def test_parse_limits():
+    assert parse_limits("answer=3/6, /quiz=1/30,default=0,") == {
+        "answer": (2.0, 4.0), "quiz": (30.0, 0.0), "default": None}
+
+def test_user_and_chat_limits():
+    throttle = ThrottleMiddleware("quiz=2/60", "quiz=3/60")
+    other = Message(message_id=2, date=datetime.now(timezone.utc), chat=GROUP,
+                    from_user=User(id=8, is_bot=False, first_name="q"), text="/quiz")
+    handled = run(throttle, [_command("/quiz"), _command("/quiz@trivia_bot"), _command("/quiz"),
+                             other, other, _command("/help"), _command("not a command")])
+    # the player gets two, the chat three in all; unlimited commands and plain text pass
+    assert [(m.from_user.id, m.text) for m in handled] == [
+        (7, "/quiz"), (7, "/quiz@trivia_bot"), (8, "/quiz"), (7, "/help"), (7, "not a command")]
+    assert throttle.dropped == 2
+
+def test_dropped_tap_is_still_answered():
+    session = FakeSession()
+    bot = Bot("123456:test", session=session)
+    throttle = ThrottleMiddleware("ans=1/60", "")
+    handled = run(throttle, [_tap(bot, 1), _tap(bot, 2)])
+    assert [cq.id for cq in handled] == ["1"]
+    assert [(type(m), m.callback_query_id, m.text) for m in session.calls] == [(AnswerCallbackQuery, "2", None)]